@@ -1,12 +1,91 @@
 """Fixtures for Modbus Proxy integration tests."""
 
-import json
 import os
+import re
+import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
+import aiohttp
+import orjson
 import paho.mqtt.client as mqtt
 import pytest
+import pytest_asyncio
 import requests
+import vcr
+from filelock import FileLock
+from paho.mqtt.packettypes import PacketTypes
+from paho.mqtt.properties import Properties
+from requests.adapters import HTTPAdapter
+from requests_cache import DO_NOT_CACHE, CacheMixin
+from urllib3.util.retry import Retry
+
+
+CASSETTE_DIR = os.path.join(os.path.dirname(__file__), "cassettes")
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--mode",
+        choices=("live", "record", "replay"),
+        default="live",
+        help="live: talk to the device (default); record: talk to the device "
+        "and save HTTP cassettes; replay: run replayable tests from cassettes",
+    )
+    parser.addoption(
+        "--cache-http",
+        action="store_true",
+        default=False,
+        help="cache read-only GETs on disk for a few seconds between runs",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "integration: test talks to the live device over the network"
+    )
+    config.addinivalue_line(
+        "markers", "replayable: test can run from recorded HTTP cassettes"
+    )
+    # Cassettes are written per module; parallel workers would overwrite each
+    # other's recordings. Record serially, then replay with -n auto.
+    if config.getoption("--mode") == "record" and config.getoption(
+        "numprocesses", default=None
+    ):
+        raise pytest.UsageError("--mode=record cannot be combined with -n")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Block real sockets (pytest-socket) wherever the device is not needed.
+
+    Tests without the integration marker get no network access unless they
+    declare allow_hosts (local mock servers). In replay mode, replayable
+    integration tests run socket-free from their cassettes and the other
+    integration tests are skipped.
+    """
+    replay = config.getoption("--mode") == "replay"
+    skip = pytest.mark.skip(reason="needs a live device (not replayable)")
+    for item in items:
+        if "integration" in item.keywords:
+            if not replay:
+                continue
+            if "replayable" in item.keywords:
+                item.add_marker(pytest.mark.disable_socket)
+            else:
+                item.add_marker(skip)
+        elif "allow_hosts" not in item.keywords:
+            item.add_marker(pytest.mark.disable_socket)
+
+
+def _xdist_worker():
+    """pytest-xdist worker name ("gw0" when running without xdist)."""
+    return os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+
+
+# Identifies this test run. xdist hands every worker the same testrunuid;
+# a plain run falls back to a uuid made once per process.
+RUN_ID = os.environ.get("PYTEST_XDIST_TESTRUNUID", uuid.uuid4().hex)[:8]
 
 
 @pytest.fixture(scope="session")
@@ -16,11 +95,149 @@ def device_ip():
 
 
 @pytest.fixture(scope="session")
-def base_url(device_ip):
-    """Base HTTP URL for the device."""
+def base_url(device_ip, device_warmup):
+    """Base HTTP URL for the device, once the device has settled."""
     return f"http://{device_ip}"
 
 
+# OTA: the password is read from the firmware source, so the tests follow it
+with open(os.path.join(os.path.dirname(__file__), "../../src/http_ota.cpp")) as f:
+    OTA_PASSWORD = re.search(r'OTA_PASSWORD = "([^"]*)"', f.read()).group(1)
+# Small enough to arrive in a single upload chunk; the device only has to
+# look at the auth header and the first bytes before failing the update.
+FAKE_FIRMWARE = b"\x00" * 16
+
+
+HTTP_TIMEOUT = 5  # seconds, default for every request made through `http`
+
+
+class _DeviceSession(requests.Session):
+    """requests.Session with a default timeout and an orjson-backed GET helper."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+    def get_json(self, url, **kwargs):
+        """GET url and decode the body bytes directly with orjson."""
+        return orjson.loads(self.get(url, **kwargs).content)
+
+    def get_cacheable(self, url, **kwargs):
+        """GET a read-only URL whose response may be served from --cache-http."""
+        return self.get(url, **kwargs)
+
+
+HTTP_CACHE_NAME = os.path.join(os.path.dirname(__file__), ".http_cache")
+HTTP_CACHE_TTL = 30  # seconds
+
+
+class _CachedDeviceSession(CacheMixin, _DeviceSession):
+    """_DeviceSession backed by an SQLite cache (--cache-http).
+
+    Nothing is cached by default, so polling helpers always see the live
+    device; only get_cacheable() opts in.
+    """
+
+    def __init__(self, timeout):
+        super().__init__(
+            cache_name=HTTP_CACHE_NAME,
+            backend="sqlite",
+            expire_after=DO_NOT_CACHE,
+            allowable_codes=(200, 404),
+            allowable_methods=("GET",),
+            timeout=timeout,
+        )
+
+    def get_cacheable(self, url, **kwargs):
+        return self.get(url, expire_after=HTTP_CACHE_TTL, **kwargs)
+
+
+@pytest.fixture(scope="session")
+def http(pytestconfig):
+    """Keep-alive HTTP session shared by all tests, closed at the end."""
+    if pytestconfig.getoption("--cache-http"):
+        session = _CachedDeviceSession(HTTP_TIMEOUT)
+    else:
+        session = _DeviceSession(HTTP_TIMEOUT)
+    session.headers["Connection"] = "keep-alive"
+    session.mount(
+        "http://",
+        HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(total=2, backoff_factor=0.1),
+        ),
+    )
+    yield session
+    session.close()
+
+
+@pytest_asyncio.fixture
+async def async_http():
+    """aiohttp session for tests that overlap independent device requests."""
+    timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        yield session
+
+
+@pytest.fixture(scope="module", autouse=True)
+def vcr_cassette(request, http):
+    """Record or replay this module's HTTP traffic (--mode=record/replay).
+
+    One cassette per module, so module-scoped response fixtures are
+    captured too; record whole modules, since recording starts the
+    cassette afresh. Requests also match on their body, so the POSTs to
+    one endpoint (e.g. debug on/off) replay the right response in any
+    test order. Does nothing in live mode.
+    """
+    mode = request.config.getoption("--mode")
+    if mode == "live":
+        yield
+        return
+    cassette = os.path.join(CASSETTE_DIR, f"{request.module.__name__}.yaml")
+    record_mode = "all" if mode == "record" else "none"
+    if mode == "record" and os.path.exists(cassette):
+        # "all" still loads old episodes and appends to them
+        os.remove(cassette)
+    # Drop pooled sockets opened outside the cassette so vcr sees every request
+    http.close()
+    with vcr.use_cassette(
+        cassette,
+        record_mode=record_mode,
+        match_on=["method", "scheme", "host", "port", "path", "query", "body"],
+        ignore_localhost=True,
+    ):
+        yield
+    http.close()
+
+
+@pytest.fixture(scope="session")
+def device_warmup(request, http, device_ip):
+    """Wait once per session until the device has settled.
+
+    The device counts as settled when two consecutive /api/status reads
+    report the same dtsu_updates. With a live meter attached the counter
+    keeps moving, so this gives up quietly after a few seconds. Pulled in
+    through base_url, so tests that never reach the device (the local
+    OTA mock) do not wait for it.
+    """
+    if request.config.getoption("--mode") == "replay":
+        return
+    status_url = f"http://{device_ip}/api/status"
+    previous = None
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        current = http.get_json(status_url).get("dtsu_updates")
+        if current is not None and current == previous:
+            return
+        previous = current
+        time.sleep(0.2)
+
+
 @pytest.fixture(scope="session")
 def mqtt_broker():
     """MQTT broker address from env var or default."""
@@ -33,54 +250,192 @@ def mqtt_port():
     return int(os.environ.get("MQTT_PORT", "1883"))
 
 
-@pytest.fixture
-def mqtt_client(mqtt_broker, mqtt_port):
-    """Connected MQTT client, auto-disconnect on teardown."""
-    client = mqtt.Client(
+class _TrackingClient(mqtt.Client):
+    """paho client that remembers its subscriptions so tests can be reset."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.subscribed_topics = set()
+        self.callback_filters = set()
+
+    def subscribe(self, topic, *args, **kwargs):
+        self.subscribed_topics.add(topic)
+        return super().subscribe(topic, *args, **kwargs)
+
+    def unsubscribe(self, topic, *args, **kwargs):
+        self.subscribed_topics.discard(topic)
+        return super().unsubscribe(topic, *args, **kwargs)
+
+    def message_callback_add(self, sub, callback):
+        self.callback_filters.add(sub)
+        return super().message_callback_add(sub, callback)
+
+    def message_callback_remove(self, sub):
+        self.callback_filters.discard(sub)
+        return super().message_callback_remove(sub)
+
+
+MQTT_SESSION_EXPIRY = 3600  # seconds the broker keeps a test client's session
+
+
+def _connect_mqtt(broker, port, name):
+    """Create a client, connect it and wait for CONNACK.
+
+    The client id is stable per xdist worker within a run and the MQTTv5
+    session is resumed (clean_start=False), so a reconnect after a broker
+    restart picks up the existing session instead of starting from scratch.
+    RUN_ID in the id keeps concurrent runs against the same broker from
+    taking over each other's session.
+    """
+    connected = threading.Event()
+
+    def on_connect(client, userdata, flags, reason_code, properties):
+        if reason_code == 0:
+            connected.set()
+
+    client = _TrackingClient(
         callback_api_version=mqtt.CallbackAPIVersion.VERSION2,
-        client_id=f"test-{time.time():.0f}",
-        protocol=mqtt.MQTTv311,
+        client_id=f"{name}-{RUN_ID}-{_xdist_worker()}",
+        protocol=mqtt.MQTTv5,
     )
     client.username_pw_set("admin", "admin")
-    client.connect(mqtt_broker, mqtt_port, keepalive=30)
+    client.on_connect = on_connect
+    properties = Properties(PacketTypes.CONNECT)
+    properties.SessionExpiryInterval = MQTT_SESSION_EXPIRY
+    client.connect(
+        broker,
+        port,
+        keepalive=30,
+        clean_start=False,
+        properties=properties,
+    )
     client.loop_start()
-    time.sleep(0.5)  # Wait for connection
+    if not connected.wait(timeout=5):
+        client.loop_stop()
+        pytest.fail(f"MQTT broker {broker}:{port} did not acknowledge connect")
+    return client
+
+
+@pytest.fixture(scope="session")
+def mqtt_client(mqtt_broker, mqtt_port):
+    """Connected MQTT client shared by the whole session, disconnect at the end."""
+    client = _connect_mqtt(mqtt_broker, mqtt_port, "pytest")
     yield client
     client.loop_stop()
     client.disconnect()
 
 
+@pytest.fixture(autouse=True)
+def _mqtt_reset(request):
+    """Drop per-test callbacks and subscriptions from the shared MQTT client.
+
+    Subscriptions and topic callbacks that already existed when the test
+    started belong to wider-scoped fixtures and are left alone.
+    """
+    if "mqtt_client" not in request.fixturenames:
+        yield
+        return
+    client = request.getfixturevalue("mqtt_client")
+    topics = set(client.subscribed_topics)
+    filters = set(client.callback_filters)
+    yield
+    client.on_message = None
+    for sub in client.callback_filters - filters:
+        client.message_callback_remove(sub)
+    for topic in client.subscribed_topics - topics:
+        client.unsubscribe(topic)
+
+
+@pytest.fixture(scope="session")
+def device_lock(tmp_path_factory):
+    """Cross-worker lock serializing tests that mutate device config.
+
+    All xdist workers share the parent of their basetemp, so the lock file
+    there is seen by every worker. Without xdist it is simply uncontended.
+    """
+    root_tmp_dir = tmp_path_factory.getbasetemp().parent
+    return FileLock(str(root_tmp_dir / "device_config.lock"))
+
+
 @pytest.fixture
-def original_config(base_url):
-    """Capture and restore device config around test."""
-    resp = requests.get(f"{base_url}/api/config", timeout=5)
-    config = resp.json()
-    yield config
-    # Restore original config after test
-    requests.post(
-        f"{base_url}/api/config",
-        json={"type": "wallbox", "topic": config.get("wallbox_topic", "wallbox")},
-        timeout=5,
-    )
-    requests.post(
-        f"{base_url}/api/config",
-        json={"type": "loglevel", "level": config.get("log_level", 2)},
-        timeout=5,
-    )
+def exclusive_device(device_lock):
+    """Hold the cross-worker device lock for the duration of a test."""
+    with device_lock:
+        yield
+
+
+@pytest.fixture(scope="session")
+def config_baseline(http, base_url, device_lock):
+    """Device config as read once at the start of the session.
+
+    The read takes device_lock so it cannot land in the middle of another
+    worker's config test. Every test that changes config restores it
+    through original_config, so the first read stays valid for the rest
+    of the run.
+    """
+    with device_lock:
+        return http.get_json(f"{base_url}/api/config")
 
 
 @pytest.fixture
-def wait_for_status(base_url):
+def original_config(http, base_url, device_lock, config_baseline):
+    """Provide the session's baseline config and restore it after the test."""
+    with device_lock:
+        config = dict(config_baseline)
+        yield config
+        # Restore original config after test. /api/config takes one "type"
+        # per request, so issue the independent restores concurrently.
+        restores = [
+            {"type": "wallbox", "topic": config.get("wallbox_topic", "wallbox")},
+            {"type": "loglevel", "level": config.get("log_level", 2)},
+        ]
+        with ThreadPoolExecutor(max_workers=len(restores)) as pool:
+            list(pool.map(
+                lambda body: http.post(f"{base_url}/api/config", json=body),
+                restores,
+            ))
+
+
+@pytest.fixture(scope="session")
+def status_reader(http, base_url):
+    """Helper: fetch and decode /api/status, or another JSON path, from the device.
+
+    Every call goes to the device. Counter tests compare before/after
+    reads, and a cached "before" value would be lower than the real one,
+    letting an after > before check pass without the device doing anything.
+    """
+
+    def _read(path="/api/status"):
+        return http.get_json(f"{base_url}{path}")
+
+    return _read
+
+
+@pytest.fixture
+def wait_for_status(status_reader):
     """Helper: poll /api/status until a condition is met or timeout."""
 
-    def _wait(key, expected, timeout=10, interval=1):
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            resp = requests.get(f"{base_url}/api/status", timeout=5)
-            data = resp.json()
-            if data.get(key) == expected:
+    def _wait(
+        key, expected, timeout=10, interval=0.05, max_interval=0.5,
+        path="/api/status",
+    ):
+        """Wait until data[key] == expected, or expected(data[key]) if callable.
+
+        The poll delay starts at interval and doubles up to max_interval.
+        Pass path="/api/config" to poll config values such as log_level.
+        """
+        if callable(expected):
+            predicate = expected
+        else:
+            predicate = lambda value: value == expected  # noqa: E731
+        deadline = time.monotonic() + timeout
+        delay = interval
+        while time.monotonic() < deadline:
+            data = status_reader(path)
+            if predicate(data.get(key)):
                 return data
-            time.sleep(interval)
+            time.sleep(delay)
+            delay = min(delay * 2, max_interval)
         # Return last status even if condition not met
         return data
 
@@ -88,25 +443,19 @@ def wait_for_status(base_url):
 
 
 @pytest.fixture
-def subscribe_and_collect(mqtt_client):
-    """Subscribe to a topic and collect messages."""
+def wait_for_change(wait_for_status):
+    """Helper: poll /api/status until a counter rises above a previous value.
 
-    collected = []
+    Returns the last status dict as soon as data[key] >= previous + delta,
+    or after timeout so the caller's assertion reports the actual value.
+    """
 
-    def _subscribe(topic, count=1, timeout=10):
-        collected.clear()
+    def _wait(key, previous, delta=1, timeout=3, interval=0.05):
+        return wait_for_status(
+            key,
+            lambda value: (value or 0) >= previous + delta,
+            timeout=timeout,
+            interval=interval,
+        )
 
-        def on_message(client, userdata, msg, *args):
-            collected.append(msg.payload.decode("utf-8", errors="replace"))
-
-        mqtt_client.subscribe(topic, qos=0)
-        mqtt_client.on_message = on_message
-
-        deadline = time.time() + timeout
-        while len(collected) < count and time.time() < deadline:
-            time.sleep(0.1)
-
-        mqtt_client.unsubscribe(topic)
-        return list(collected)
-
-    return _subscribe
+    return _wait
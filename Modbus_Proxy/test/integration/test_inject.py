@@ -5,198 +5,170 @@ the proxy pipeline. It requires debug mode to be enabled first.
 
 Requires a live device at DEVICE_IP.
 Run with: pytest test/integration/test_inject.py -v
+Parallel: pytest test/integration/ -n 4 --dist loadgroup
 """
 
-import json
+import asyncio
 
+import orjson
 import pytest
-import requests
 
-pytestmark = pytest.mark.timeout(30)
+pytestmark = [pytest.mark.integration, pytest.mark.timeout(30)]
 
 
-@pytest.fixture(autouse=True)
-def enable_debug_mode(base_url):
-    """Enable debug mode before each test, disable after."""
-    requests.post(
-        f"{base_url}/api/debug",
-        json={"enabled": True},
-        timeout=5,
-    )
-    yield
-    requests.post(
-        f"{base_url}/api/debug",
-        json={"enabled": False},
-        timeout=5,
-    )
+@pytest.fixture(scope="module", autouse=True)
+def enable_debug_mode(http, base_url, device_lock):
+    """Enable debug mode once for this module, disable after."""
+    with device_lock:
+        http.post(
+            f"{base_url}/api/debug",
+            json={"enabled": True},
+        )
+        yield
+        http.post(
+            f"{base_url}/api/debug",
+            json={"enabled": False},
+        )
 
 
 # --- Access control ---
 
 
 class TestInjectAccessControl:
-    def test_requires_debug_mode(self, base_url):
-        """Injection endpoint returns 403 when debug mode is off."""
-        # Disable debug mode
-        requests.post(
+    def test_allowed_when_debug_enabled(self, http, base_url):
+        resp = http.post(
+            f"{base_url}/api/test/inject",
+            json={"power_total": 5000.0},
+        )
+        assert resp.status_code == 200
+        data = orjson.loads(resp.content)
+        assert data["status"] == "ok"
+
+
+class TestInjectDebugDisabled:
+    @pytest.fixture
+    def debug_disabled(self, http, base_url):
+        """Turn debug mode off for one test, back on for the rest of the module."""
+        http.post(
             f"{base_url}/api/debug",
             json={"enabled": False},
-            timeout=5,
         )
-        resp = requests.post(
+        yield
+        http.post(
+            f"{base_url}/api/debug",
+            json={"enabled": True},
+        )
+
+    def test_requires_debug_mode(self, http, base_url, debug_disabled):
+        """Injection endpoint returns 403 when debug mode is off."""
+        resp = http.post(
             f"{base_url}/api/test/inject",
             json={"power_total": 5000.0},
-            timeout=5,
         )
         assert resp.status_code == 403
-        data = resp.json()
+        data = orjson.loads(resp.content)
         assert data["status"] == "error"
         assert "debug" in data["message"].lower()
 
-    def test_allowed_when_debug_enabled(self, base_url):
-        resp = requests.post(
-            f"{base_url}/api/test/inject",
-            json={"power_total": 5000.0},
-            timeout=5,
-        )
-        assert resp.status_code == 200
-        data = resp.json()
-        assert data["status"] == "ok"
-
 
 # --- Basic injection ---
 
 
 class TestInjectBasic:
-    def test_default_values(self, base_url):
-        """Inject with no parameters uses defaults (5000W, 230V, 50Hz, 10A)."""
-        resp = requests.post(
+    @pytest.mark.parametrize(
+        "payload, expected, tol",
+        [
+            # No parameters: defaults (5000W, 230V, 50Hz, 10A)
+            pytest.param({}, None, None, id="default_values"),
+            pytest.param({"power_total": 7400.0}, 7400.0, 10.0, id="custom_power"),
+            pytest.param({"power_total": 0.0}, 0.0, 1.0, id="zero_power"),
+            # Export/feed-in
+            pytest.param({"power_total": -3000.0}, 3000.0, 10.0, id="negative_power"),
+            pytest.param({"power_total": 22000.0}, 22000.0, 50.0, id="large_power"),
+            pytest.param(
+                {
+                    "power_total": 5000.0,
+                    "voltage": 240.0,
+                    "frequency": 50.05,
+                    "current": 20.0,
+                },
+                5000.0,
+                10.0,
+                id="custom_voltage_frequency",
+            ),
+        ],
+    )
+    def test_inject_variants(self, http, base_url, payload, expected, tol):
+        """Inject a payload and check the proxied power value."""
+        resp = http.post(
             f"{base_url}/api/test/inject",
-            json={},
-            timeout=5,
+            json=payload,
         )
         assert resp.status_code == 200
-        data = resp.json()
+        data = orjson.loads(resp.content)
         assert data["status"] == "ok"
         assert "dtsu_power" in data
         assert "wallbox_power" in data
         assert "correction_active" in data
         assert "sun2000_power" in data
-
-    def test_custom_power(self, base_url):
-        """Inject specific power value."""
-        resp = requests.post(
-            f"{base_url}/api/test/inject",
-            json={"power_total": 7400.0},
-            timeout=5,
-        )
-        assert resp.status_code == 200
-        data = resp.json()
-        assert data["status"] == "ok"
-        # Power sign is negated by wire format round-trip (power_scale=-1)
-        assert abs(abs(data["dtsu_power"]) - 7400.0) < 10.0
-
-    def test_zero_power(self, base_url):
-        """Inject zero power."""
-        resp = requests.post(
-            f"{base_url}/api/test/inject",
-            json={"power_total": 0.0},
-            timeout=5,
-        )
-        assert resp.status_code == 200
-        data = resp.json()
-        assert data["status"] == "ok"
-        assert abs(data["dtsu_power"]) < 1.0
-
-    def test_negative_power(self, base_url):
-        """Inject negative power (export/feed-in)."""
-        resp = requests.post(
-            f"{base_url}/api/test/inject",
-            json={"power_total": -3000.0},
-            timeout=5,
-        )
-        assert resp.status_code == 200
-        data = resp.json()
-        assert data["status"] == "ok"
-        # Wire format round-trip negates sign, so -3000 becomes 3000
-        assert abs(abs(data["dtsu_power"]) - 3000.0) < 10.0
-
-    def test_large_power(self, base_url):
-        """Inject large power value (22kW)."""
-        resp = requests.post(
-            f"{base_url}/api/test/inject",
-            json={"power_total": 22000.0},
-            timeout=5,
-        )
-        assert resp.status_code == 200
-        data = resp.json()
-        assert data["status"] == "ok"
-        assert abs(abs(data["dtsu_power"]) - 22000.0) < 50.0
-
-    def test_custom_voltage_frequency(self, base_url):
-        """Inject custom voltage and frequency."""
-        resp = requests.post(
-            f"{base_url}/api/test/inject",
-            json={
-                "power_total": 5000.0,
-                "voltage": 240.0,
-                "frequency": 50.05,
-                "current": 20.0,
-            },
-            timeout=5,
-        )
-        assert resp.status_code == 200
-        data = resp.json()
-        assert data["status"] == "ok"
+        if expected is not None:
+            # Power sign is negated by wire format round-trip (power_scale=-1)
+            assert abs(abs(data["dtsu_power"]) - expected) < tol
 
 
 # --- Status integration ---
 
 
 class TestInjectStatusIntegration:
-    def test_updates_dtsu_counter(self, base_url):
+    # xdist_group only keeps these counter tests on one worker; it does not
+    # exclude other workers. Exclusion comes from device_lock, which the
+    # module's enable_debug_mode fixture holds while these tests run.
+    @pytest.mark.xdist_group("device_state")
+    def test_updates_dtsu_counter(self, http, base_url):
         """Injection increments dtsu_updates counter."""
-        import time
-        time.sleep(1)  # Allow device to settle from prior tests
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        before = resp.json().get("dtsu_updates", 0)
+        resp = http.get(f"{base_url}/api/status")
+        before = orjson.loads(resp.content).get("dtsu_updates", 0)
 
-        requests.post(
+        http.post(
             f"{base_url}/api/test/inject",
             json={"power_total": 5000.0},
-            timeout=5,
         )
 
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        after = resp.json().get("dtsu_updates", 0)
+        resp = http.get(f"{base_url}/api/status")
+        after = orjson.loads(resp.content).get("dtsu_updates", 0)
         assert after > before
 
-    def test_updates_status_power(self, base_url):
+    def test_updates_status_power(self, http, base_url):
         """Injection updates dtsu_power in /api/status."""
-        inject_resp = requests.post(
+        inject_resp = http.post(
             f"{base_url}/api/test/inject",
             json={"power_total": 8888.0},
-            timeout=5,
         )
-        expected = inject_resp.json()["sun2000_power"]
+        expected = orjson.loads(inject_resp.content)["sun2000_power"]
 
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
+        resp = http.get(f"{base_url}/api/status")
+        data = orjson.loads(resp.content)
         # Status reflects sun2000_power (includes any active wallbox correction)
         assert abs(data["dtsu_power"] - expected) < 20.0
 
-    def test_multiple_injections(self, base_url):
+    @pytest.mark.xdist_group("device_state")
+    @pytest.mark.asyncio
+    async def test_multiple_injections(self, async_http, base_url):
         """Multiple injections update status each time."""
-        for power in [1000.0, 5000.0, 9000.0]:
-            inject_resp = requests.post(
+
+        async def inject(power):
+            async with async_http.post(
                 f"{base_url}/api/test/inject",
                 json={"power_total": power},
-                timeout=5,
-            )
+            ) as resp:
+                return await resp.json(loads=orjson.loads)
+
+        # Earlier injections may overlap; the final value must land last
+        await asyncio.gather(inject(1000.0), inject(5000.0))
+        expected = (await inject(9000.0))["sun2000_power"]
 
-        expected = inject_resp.json()["sun2000_power"]
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
+        async with async_http.get(f"{base_url}/api/status") as resp:
+            data = await resp.json(loads=orjson.loads)
         assert abs(data["dtsu_power"] - expected) < 20.0
 
 
@@ -204,32 +176,30 @@ class TestInjectStatusIntegration:
 
 
 class TestInjectCorrection:
-    def test_correction_without_wallbox(self, base_url):
+    def test_correction_without_wallbox(self, http, base_url):
         """Without wallbox data, correction should not be active."""
-        resp = requests.post(
+        resp = http.post(
             f"{base_url}/api/test/inject",
             json={"power_total": 5000.0},
-            timeout=5,
         )
-        data = resp.json()
+        data = orjson.loads(resp.content)
         # Without recent wallbox MQTT message, correction won't apply
         # sun2000_power should equal dtsu_power
         if not data["correction_active"]:
             assert abs(data["sun2000_power"] - data["dtsu_power"]) < 1.0
 
-    def test_correction_with_wallbox(self, base_url, mqtt_client):
+    def test_correction_with_wallbox(self, http, base_url, mqtt_client):
         """With wallbox data above threshold, correction should apply."""
         # Send wallbox power via MQTT
         mqtt_client.publish("wallbox", "3000.0", qos=0)
         import time
         time.sleep(2)
 
-        resp = requests.post(
+        resp = http.post(
             f"{base_url}/api/test/inject",
             json={"power_total": 5000.0},
-            timeout=5,
         )
-        data = resp.json()
+        data = orjson.loads(resp.content)
 
         if data["correction_active"]:
             # sun2000_power should differ from dtsu_power by ~wallbox_power
@@ -237,14 +207,13 @@ class TestInjectCorrection:
             assert delta > 100  # Some correction was applied
         # If correction not active, wallbox data may have expired
 
-    def test_response_fields_present(self, base_url):
+    def test_response_fields_present(self, http, base_url):
         """Response has all expected fields."""
-        resp = requests.post(
+        resp = http.post(
             f"{base_url}/api/test/inject",
             json={"power_total": 5000.0},
-            timeout=5,
         )
-        data = resp.json()
+        data = orjson.loads(resp.content)
         assert "status" in data
         assert "dtsu_power" in data
         assert "wallbox_power" in data
@@ -257,16 +226,15 @@ class TestInjectCorrection:
 
 
 class TestInjectErrors:
-    def test_invalid_json(self, base_url):
-        resp = requests.post(
+    def test_invalid_json(self, http, base_url):
+        resp = http.post(
             f"{base_url}/api/test/inject",
             data="{not valid json",
             headers={"Content-Type": "application/json"},
-            timeout=5,
         )
         assert resp.status_code == 400
 
-    def test_method_not_allowed(self, base_url):
+    def test_method_not_allowed(self, http, base_url):
         """GET on injection endpoint should return 405 or 404."""
-        resp = requests.get(f"{base_url}/api/test/inject", timeout=5)
+        resp = http.get(f"{base_url}/api/test/inject")
         assert resp.status_code in (404, 405)
@@ -5,12 +5,20 @@ Run with: pytest test/integration/test_mqtt.py -v
 """
 
 import json
+import queue
+import threading
 import time
 
+import orjson
 import pytest
-import requests
 
-pytestmark = pytest.mark.timeout(30)
+pytestmark = [pytest.mark.integration, pytest.mark.timeout(30)]
+
+
+def _publish_wallbox(mqtt_client, payload):
+    """Publish to the wallbox topic with QoS 1 and wait for the broker's PUBACK."""
+    info = mqtt_client.publish("wallbox", payload, qos=1)
+    info.wait_for_publish(timeout=2)
 
 
 # --- Wallbox power message formats ---
@@ -24,125 +32,125 @@ class TestWallboxMessages:
     DTSU meter. We verify reception via the wallbox_updates counter instead.
     """
 
-    def _get_updates(self, base_url):
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
+    def _get_updates(self, status_reader):
+        data = status_reader()
         return data.get("wallbox_updates", 0), data.get("wallbox_errors", 0)
 
-    def test_plain_float(self, mqtt_client, base_url):
-        before_updates, _ = self._get_updates(base_url)
-        mqtt_client.publish("wallbox", "3456.7", qos=0)
-        time.sleep(2)
-        after_updates, _ = self._get_updates(base_url)
-        assert after_updates > before_updates
-
-    def test_json_power_key(self, mqtt_client, base_url):
-        before_updates, _ = self._get_updates(base_url)
-        mqtt_client.publish("wallbox", json.dumps({"power": 5000.0}), qos=0)
-        time.sleep(2)
-        after_updates, _ = self._get_updates(base_url)
-        assert after_updates > before_updates
-
-    def test_json_chargepower_key(self, mqtt_client, base_url):
-        before_updates, _ = self._get_updates(base_url)
-        mqtt_client.publish("wallbox", json.dumps({"chargePower": 7400}), qos=0)
-        time.sleep(2)
-        after_updates, _ = self._get_updates(base_url)
-        assert after_updates > before_updates
-
-    def test_zero_power(self, mqtt_client, base_url):
-        before_updates, _ = self._get_updates(base_url)
-        mqtt_client.publish("wallbox", "0", qos=0)
-        time.sleep(2)
-        after_updates, _ = self._get_updates(base_url)
-        assert after_updates > before_updates
-
-    def test_negative_power(self, mqtt_client, base_url):
-        before_updates, _ = self._get_updates(base_url)
-        mqtt_client.publish("wallbox", "-500.0", qos=0)
-        time.sleep(2)
-        after_updates, _ = self._get_updates(base_url)
-        assert after_updates > before_updates
+    def test_plain_float(self, status_reader, mqtt_client, wait_for_change):
+        before_updates, _ = self._get_updates(status_reader)
+        _publish_wallbox(mqtt_client, "3456.7")
+        data = wait_for_change("wallbox_updates", before_updates)
+        assert data.get("wallbox_updates", 0) > before_updates
+
+    def test_json_power_key(self, status_reader, mqtt_client, wait_for_change):
+        before_updates, _ = self._get_updates(status_reader)
+        _publish_wallbox(mqtt_client, json.dumps({"power": 5000.0}))
+        data = wait_for_change("wallbox_updates", before_updates)
+        assert data.get("wallbox_updates", 0) > before_updates
+
+    def test_json_chargepower_key(self, status_reader, mqtt_client, wait_for_change):
+        before_updates, _ = self._get_updates(status_reader)
+        _publish_wallbox(mqtt_client, json.dumps({"chargePower": 7400}))
+        data = wait_for_change("wallbox_updates", before_updates)
+        assert data.get("wallbox_updates", 0) > before_updates
+
+    def test_zero_power(self, status_reader, mqtt_client, wait_for_change):
+        before_updates, _ = self._get_updates(status_reader)
+        _publish_wallbox(mqtt_client, "0")
+        data = wait_for_change("wallbox_updates", before_updates)
+        assert data.get("wallbox_updates", 0) > before_updates
+
+    def test_negative_power(self, status_reader, mqtt_client, wait_for_change):
+        before_updates, _ = self._get_updates(status_reader)
+        _publish_wallbox(mqtt_client, "-500.0")
+        data = wait_for_change("wallbox_updates", before_updates)
+        assert data.get("wallbox_updates", 0) > before_updates
 
 
 # --- MQTT config commands ---
 
+CONFIG_RESPONSE_TOPIC = "MBUS-PROXY/cmd/config/response"
 
-class TestMqttConfigCommands:
-    def test_get_config(self, mqtt_client, subscribe_and_collect):
-        # Subscribe to response topic first
-        collected = []
+# Fixed command payloads, pre-encoded so publish() sends them as-is
+CMD_GET_CONFIG = json.dumps({"cmd": "get_config"}).encode()
+CMD_UNKNOWN = json.dumps({"cmd": "nonexistent_command"}).encode()
+CMD_LOG_DEBUG = json.dumps({"cmd": "set_log_level", "level": 0}).encode()
+CMD_LOG_WARN = json.dumps({"cmd": "set_log_level", "level": 2}).encode()
+
+
+@pytest.fixture(scope="class")
+def config_response_subscription(mqtt_client):
+    """Subscribe to the config response topic once per class.
+
+    Yields a queue that receives every response payload.
+    """
+    responses = queue.Queue()
+    subscribed = threading.Event()
+
+    def on_response(client, userdata, msg):
+        responses.put(msg.payload.decode())
+
+    def on_subscribe(client, userdata, mid, reason_codes, properties):
+        subscribed.set()
 
-        def on_msg(client, userdata, msg, *args):
-            collected.append(msg.payload.decode())
+    mqtt_client.message_callback_add(CONFIG_RESPONSE_TOPIC, on_response)
+    mqtt_client.on_subscribe = on_subscribe
+    mqtt_client.subscribe(CONFIG_RESPONSE_TOPIC, qos=0)
+    subscribed.wait(timeout=5)
+    mqtt_client.on_subscribe = None
+    yield responses
+    mqtt_client.unsubscribe(CONFIG_RESPONSE_TOPIC)
+    mqtt_client.message_callback_remove(CONFIG_RESPONSE_TOPIC)
 
-        mqtt_client.subscribe("MBUS-PROXY/cmd/config/response", qos=0)
-        mqtt_client.on_message = on_msg
-        time.sleep(0.5)
 
+@pytest.fixture
+def config_response_queue(config_response_subscription):
+    """Config response queue, cleared of replies to earlier tests."""
+    while not config_response_subscription.empty():
+        config_response_subscription.get_nowait()
+    return config_response_subscription
+
+
+class TestMqttConfigCommands:
+    def test_get_config(self, mqtt_client, config_response_queue):
         mqtt_client.publish(
             "MBUS-PROXY/cmd/config",
-            json.dumps({"cmd": "get_config"}),
+            CMD_GET_CONFIG,
             qos=0,
         )
 
-        deadline = time.time() + 10
-        while not collected and time.time() < deadline:
-            time.sleep(0.2)
-
-        mqtt_client.unsubscribe("MBUS-PROXY/cmd/config/response")
-
-        assert len(collected) > 0
-        data = json.loads(collected[0])
+        data = orjson.loads(config_response_queue.get(timeout=10))
         assert "mqtt_host" in data
         assert "mqtt_port" in data
         assert "wallbox_topic" in data
 
-    def test_set_log_level(self, mqtt_client, base_url):
+    @pytest.mark.usefixtures("exclusive_device")
+    def test_set_log_level(self, mqtt_client, wait_for_status):
         # Set log level to DEBUG (0)
         mqtt_client.publish(
             "MBUS-PROXY/cmd/config",
-            json.dumps({"cmd": "set_log_level", "level": 0}),
+            CMD_LOG_DEBUG,
             qos=0,
         )
-        time.sleep(2)
-
-        resp = requests.get(f"{base_url}/api/config", timeout=5)
-        data = resp.json()
+        data = wait_for_status("log_level", 0, timeout=5, path="/api/config")
         assert data["log_level"] == 0
 
         # Restore to WARN (2)
         mqtt_client.publish(
             "MBUS-PROXY/cmd/config",
-            json.dumps({"cmd": "set_log_level", "level": 2}),
+            CMD_LOG_WARN,
             qos=0,
         )
-        time.sleep(2)
-
-    def test_unknown_command(self, mqtt_client):
-        collected = []
-
-        def on_msg(client, userdata, msg, *args):
-            collected.append(msg.payload.decode())
-
-        mqtt_client.subscribe("MBUS-PROXY/cmd/config/response", qos=0)
-        mqtt_client.on_message = on_msg
-        time.sleep(0.5)
+        wait_for_status("log_level", 2, timeout=5, path="/api/config")
 
+    def test_unknown_command(self, mqtt_client, config_response_queue):
         mqtt_client.publish(
             "MBUS-PROXY/cmd/config",
-            json.dumps({"cmd": "nonexistent_command"}),
+            CMD_UNKNOWN,
             qos=0,
         )
 
-        deadline = time.time() + 10
-        while not collected and time.time() < deadline:
-            time.sleep(0.2)
-
-        mqtt_client.unsubscribe("MBUS-PROXY/cmd/config/response")
-
-        assert len(collected) > 0
-        data = json.loads(collected[0])
+        data = orjson.loads(config_response_queue.get(timeout=10))
         assert data.get("status") == "error"
 
 
@@ -150,117 +158,96 @@ class TestMqttConfigCommands:
 
 
 class TestMqttEdgeCases:
-    def test_empty_message(self, mqtt_client, base_url):
+    def test_empty_message(self, http, mqtt_client, base_url, status_reader):
         """Empty wallbox message should be ignored gracefully."""
         # Record current error count
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        before_errors = resp.json().get("wallbox_errors", 0)
+        before_errors = status_reader().get("wallbox_errors", 0)
 
-        mqtt_client.publish("wallbox", "", qos=0)
-        time.sleep(2)
+        _publish_wallbox(mqtt_client, "")
+        time.sleep(0.2)
 
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        after_errors = resp.json().get("wallbox_errors", 0)
+        resp = http.get(f"{base_url}/api/status")
+        assert resp.status_code == 200  # Device still alive
+        after_errors = orjson.loads(resp.content).get("wallbox_errors", 0)
         # Error count should increase or stay same (no crash)
         assert after_errors >= before_errors
 
-    def test_non_numeric_message(self, mqtt_client, base_url):
+    def test_non_numeric_message(self, mqtt_client, status_reader, wait_for_change):
         """Non-numeric wallbox message should increment error count."""
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        before_errors = resp.json().get("wallbox_errors", 0)
+        before_errors = status_reader().get("wallbox_errors", 0)
 
-        mqtt_client.publish("wallbox", "not_a_number", qos=0)
-        time.sleep(2)
+        _publish_wallbox(mqtt_client, "not_a_number")
 
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        after_errors = resp.json().get("wallbox_errors", 0)
-        assert after_errors > before_errors
+        data = wait_for_change("wallbox_errors", before_errors)
+        assert data.get("wallbox_errors", 0) > before_errors
 
-    def test_oversized_message(self, mqtt_client, base_url):
+    def test_oversized_message(self, http, mqtt_client, base_url):
         """Oversized message (>256 bytes) should be handled gracefully."""
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
+        resp = http.get(f"{base_url}/api/status")
         assert resp.status_code == 200  # Device alive before
 
         large_payload = "x" * 300
-        mqtt_client.publish("wallbox", large_payload, qos=0)
-        time.sleep(2)
+        _publish_wallbox(mqtt_client, large_payload)
+        time.sleep(0.2)
 
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
+        resp = http.get(f"{base_url}/api/status")
         assert resp.status_code == 200  # Device still alive
 
-    def test_malformed_json(self, mqtt_client, base_url):
+    def test_malformed_json(self, http, mqtt_client, base_url):
         """Malformed JSON config command should not crash device."""
         mqtt_client.publish(
             "MBUS-PROXY/cmd/config", "{invalid json", qos=0
         )
-        time.sleep(2)
+        time.sleep(0.2)
 
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
+        resp = http.get(f"{base_url}/api/status")
         assert resp.status_code == 200  # Device still alive
 
-    def test_missing_cmd_field(self, mqtt_client):
+    def test_missing_cmd_field(self, mqtt_client, config_response_queue):
         """JSON without cmd field should return error."""
-        collected = []
-
-        def on_msg(client, userdata, msg, *args):
-            collected.append(msg.payload.decode())
-
-        mqtt_client.subscribe("MBUS-PROXY/cmd/config/response", qos=0)
-        mqtt_client.on_message = on_msg
-        time.sleep(0.5)
-
         mqtt_client.publish(
             "MBUS-PROXY/cmd/config",
             json.dumps({"foo": "bar"}),
             qos=0,
         )
 
-        deadline = time.time() + 10
-        while not collected and time.time() < deadline:
-            time.sleep(0.2)
-
-        mqtt_client.unsubscribe("MBUS-PROXY/cmd/config/response")
+        try:
+            response = config_response_queue.get(timeout=10)
+        except queue.Empty:
+            return  # Device may drop the command without replying
 
-        if collected:
-            data = json.loads(collected[0])
-            assert data.get("status") == "error"
+        data = orjson.loads(response)
+        assert data.get("status") == "error"
 
-    def test_rapid_messages(self, mqtt_client, base_url):
-        """10 messages in 1 second should not crash device."""
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        before_updates = resp.json().get("wallbox_updates", 0)
+    def test_rapid_messages(self, mqtt_client, status_reader, wait_for_change):
+        """10 back-to-back messages should not crash device."""
+        before_updates = status_reader().get("wallbox_updates", 0)
 
+        # Burst without PUBACK waits or pauses so the device sees them together
         for i in range(10):
             mqtt_client.publish("wallbox", str(1000 + i), qos=0)
-            time.sleep(0.1)
-
-        time.sleep(2)
 
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
-        assert resp.status_code == 200
+        data = wait_for_change("wallbox_updates", before_updates, delta=1, timeout=5)
         # Device should have received multiple updates without crashing
         assert data.get("wallbox_updates", 0) > before_updates
 
-    def test_special_chars_in_value(self, mqtt_client, base_url):
+    def test_special_chars_in_value(self, http, mqtt_client, base_url):
         """Special characters in message should not crash device."""
-        mqtt_client.publish("wallbox", "12<>34&\"'", qos=0)
-        time.sleep(2)
+        _publish_wallbox(mqtt_client, "12<>34&\"'")
+        time.sleep(0.2)
 
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
+        resp = http.get(f"{base_url}/api/status")
         assert resp.status_code == 200  # Device still alive
 
-    def test_negative_wallbox_value(self, mqtt_client, base_url):
+    def test_negative_wallbox_value(self, mqtt_client, status_reader, wait_for_change):
         """Negative values should be received without error."""
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        before_updates = resp.json().get("wallbox_updates", 0)
-        before_errors = resp.json().get("wallbox_errors", 0)
+        data = status_reader()
+        before_updates = data.get("wallbox_updates", 0)
+        before_errors = data.get("wallbox_errors", 0)
 
-        mqtt_client.publish("wallbox", "-3000.5", qos=0)
-        time.sleep(2)
+        _publish_wallbox(mqtt_client, "-3000.5")
 
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
+        data = wait_for_change("wallbox_updates", before_updates)
         # Should be counted as a valid update, not an error
         assert data.get("wallbox_updates", 0) > before_updates
         assert data.get("wallbox_errors", 0) == before_errors
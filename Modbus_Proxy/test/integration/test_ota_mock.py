@@ -0,0 +1,88 @@
+"""OTA upload auth checks against a local mock of the DUT's /ota endpoint.
+
+The mock mirrors the upload and completion handlers in src/http_ota.cpp,
+so the auth code paths run in milliseconds without a device. It checks
+what the suite expects of the firmware, not the firmware itself: only
+the password is taken from the source (OTA_PASSWORD in conftest). The
+real endpoint is still exercised by TestOtaAuth in test_rest_api.py,
+including the wrong-password rejection.
+
+Run with: pytest test/integration/test_ota_mock.py -v
+"""
+
+import orjson
+import pytest
+import requests
+from werkzeug.wrappers import Response
+
+from conftest import FAKE_FIRMWARE, OTA_PASSWORD
+
+pytestmark = [pytest.mark.allow_hosts(["127.0.0.1"]), pytest.mark.timeout(5)]
+
+
+def _ota_handler(request):
+    """Emulate http_ota.cpp: Update only starts when the bearer token matches.
+
+    The completion handler answers 500/"error" if Update.hasError(), else
+    200/"ok". A rejected upload never calls Update.begin(), and
+    Update.end() without a begin() returns false without setting an
+    error, so it gets 200. An accepted upload of zeros fails Update.end()
+    and gets 500.
+    """
+    if "firmware" not in request.files:
+        return Response(status=400)
+    authorized = request.headers.get("Authorization") == f"Bearer {OTA_PASSWORD}"
+    if authorized:
+        status, body = 500, {"status": "error", "message": "Update failed"}
+    else:
+        status, body = 200, {"status": "ok", "message": "Rebooting..."}
+    return Response(
+        orjson.dumps(body),
+        status=status,
+        content_type="application/json",
+        headers={"Connection": "close"},
+    )
+
+
+@pytest.fixture(scope="session")
+def httpserver_listen_address():
+    """Bind the mock to IPv4 loopback, the only host allow_hosts lets through.
+
+    "localhost" may resolve to ::1 first, which pytest-socket would block.
+    """
+    return ("127.0.0.1", 0)
+
+
+@pytest.fixture
+def ota_url(httpserver):
+    httpserver.expect_request("/ota", method="POST").respond_with_handler(_ota_handler)
+    return httpserver.url_for("/ota")
+
+
+def _upload(url, headers=None):
+    return requests.post(
+        url,
+        files={"firmware": ("firmware.bin", FAKE_FIRMWARE)},
+        headers=headers,
+        timeout=2,
+    )
+
+
+class TestOtaAuthMock:
+    def test_ota_no_auth_rejected(self, ota_url):
+        """Upload without auth header never starts an update."""
+        resp = _upload(ota_url)
+        assert resp.status_code == 200
+        assert orjson.loads(resp.content)["status"] == "ok"
+
+    def test_ota_wrong_password_rejected(self, ota_url):
+        """Upload with a wrong bearer token never starts an update."""
+        resp = _upload(ota_url, headers={"Authorization": "Bearer wrong_password"})
+        assert resp.status_code == 200
+        assert orjson.loads(resp.content)["status"] == "ok"
+
+    def test_ota_correct_auth_invalid_firmware(self, ota_url):
+        """Correct token but invalid image fails the update."""
+        resp = _upload(ota_url, headers={"Authorization": f"Bearer {OTA_PASSWORD}"})
+        assert resp.status_code == 500
+        assert orjson.loads(resp.content)["status"] == "error"
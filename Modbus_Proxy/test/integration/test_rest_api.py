@@ -2,165 +2,191 @@
 
 Requires a live device at DEVICE_IP (default 192.168.0.177).
 Run with: pytest test/integration/test_rest_api.py -v
+Parallel: pytest test/integration/ -n 4 --dist loadgroup
+
+Replay without a device: record once with --mode=record, then run with
+--mode=replay; tests not marked replayable are skipped. Replay is
+device-free, so it parallelises freely:
+    pytest test/integration/ --mode=replay -n auto --dist loadscope
+While iterating, --cache-http serves the read-only GETs (status/config
+snapshots, 404, OTA health) from an on-disk cache for 30 s.
+
+Classes that change device state share the "dut_mutation" xdist group so
+they run on one worker; the read-only classes spread across workers.
+Config writes and the debug toggle/verify test run in a forked subprocess
+(pytest-isolate) with a 20 s limit, so a request hung on a rebooting
+device is killed and its sockets released instead of stalling a worker.
 """
 
-import json
+import time
 
+import orjson
 import pytest
 import requests
 
+from conftest import FAKE_FIRMWARE, OTA_PASSWORD
+
 # All tests require network access to device
-pytestmark = pytest.mark.timeout(15)
+pytestmark = [pytest.mark.integration, pytest.mark.timeout(15)]
+
+# (connect, read) timeouts. Over a kept-alive connection the device answers
+# in well under 200 ms, so a hiccup fails fast and pytest-timeout bounds
+# the test; OTA uploads get a longer read window.
+FAST_TIMEOUT = (1.0, 2.0)
+SLOW_TIMEOUT = (2.0, 10.0)
 
 
 # --- GET /api/status ---
 
 
-class TestApiStatus:
-    def test_status_returns_200(self, base_url):
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        assert resp.status_code == 200
+@pytest.fixture(scope="module")
+def status_snapshot(http, base_url):
+    """One GET /api/status response shared by all TestApiStatus checks."""
+    return http.get_cacheable(f"{base_url}/api/status", timeout=FAST_TIMEOUT)
+
+
+@pytest.fixture(scope="module")
+def config_snapshot(http, base_url):
+    """One GET /api/config response shared by all TestApiConfig checks."""
+    return http.get_cacheable(f"{base_url}/api/config", timeout=FAST_TIMEOUT)
+
+
+@pytest.fixture(scope="module")
+def status_data(status_snapshot):
+    """status_snapshot body, decoded once for all parametrized checks."""
+    return orjson.loads(status_snapshot.content)
 
-    def test_status_is_json(self, base_url):
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        assert resp.headers["content-type"] == "application/json"
-        data = resp.json()
-        assert isinstance(data, dict)
-
-    def test_status_has_uptime(self, base_url):
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
-        assert "uptime" in data
-        assert isinstance(data["uptime"], (int, float))
-        assert data["uptime"] > 0
-
-    def test_status_has_heap(self, base_url):
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
-        assert "free_heap" in data
-        assert isinstance(data["free_heap"], (int, float))
-        assert data["free_heap"] > 10000
-
-    def test_status_has_wifi_fields(self, base_url):
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
-        assert "wifi_connected" in data
-        assert "wifi_ssid" in data
-        assert "wifi_ip" in data
-        assert "wifi_rssi" in data
-
-    def test_status_has_mqtt_fields(self, base_url):
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
-        assert "mqtt_connected" in data
-        assert "mqtt_host" in data
-        assert "mqtt_port" in data
-
-    def test_status_has_power_fields(self, base_url):
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
-        assert "dtsu_power" in data
-        assert "wallbox_power" in data
-        assert "correction_active" in data
-
-    def test_status_has_statistics(self, base_url):
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
-        assert "dtsu_updates" in data
-        assert "wallbox_updates" in data
-        assert "wallbox_errors" in data
-
-    def test_status_has_debug_mode(self, base_url):
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
-        assert "debug_mode" in data
-        assert isinstance(data["debug_mode"], bool)
+
+@pytest.fixture(scope="module")
+def config_data(config_snapshot):
+    """config_snapshot body, decoded once for all parametrized checks."""
+    return orjson.loads(config_snapshot.content)
+
+
+@pytest.mark.replayable
+class TestApiStatus:
+    def test_status_returns_200(self, status_snapshot):
+        assert status_snapshot.status_code == 200
+
+    def test_status_is_json(self, status_snapshot, status_data):
+        assert status_snapshot.headers["content-type"] == "application/json"
+        assert isinstance(status_data, dict)
+
+    @pytest.mark.parametrize(
+        "keys, typ, pred",
+        [
+            pytest.param(("uptime",), (int, float), lambda v: v > 0, id="uptime"),
+            pytest.param(("free_heap",), (int, float), lambda v: v > 10000, id="heap"),
+            pytest.param(
+                ("wifi_connected", "wifi_ssid", "wifi_ip", "wifi_rssi"),
+                None,
+                None,
+                id="wifi_fields",
+            ),
+            pytest.param(
+                ("mqtt_connected", "mqtt_host", "mqtt_port"), None, None, id="mqtt_fields"
+            ),
+            pytest.param(
+                ("dtsu_power", "wallbox_power", "correction_active"),
+                None,
+                None,
+                id="power_fields",
+            ),
+            pytest.param(
+                ("dtsu_updates", "wallbox_updates", "wallbox_errors"),
+                None,
+                None,
+                id="statistics",
+            ),
+            pytest.param(("debug_mode",), bool, None, id="debug_mode"),
+        ],
+    )
+    def test_status_has(self, status_data, keys, typ, pred):
+        for key in keys:
+            assert key in status_data
+            if typ is not None:
+                assert isinstance(status_data[key], typ)
+            if pred is not None:
+                assert pred(status_data[key])
 
 
 # --- GET /api/config ---
 
 
+@pytest.mark.replayable
 class TestApiConfig:
-    def test_config_returns_200(self, base_url):
-        resp = requests.get(f"{base_url}/api/config", timeout=5)
-        assert resp.status_code == 200
-
-    def test_config_schema(self, base_url):
-        resp = requests.get(f"{base_url}/api/config", timeout=5)
-        data = resp.json()
-        assert "mqtt_host" in data
-        assert "mqtt_port" in data
-        assert "mqtt_user" in data
-        assert "wallbox_topic" in data
-        assert "log_level" in data
-
-    def test_config_field_types(self, base_url):
-        resp = requests.get(f"{base_url}/api/config", timeout=5)
-        data = resp.json()
-        assert isinstance(data["mqtt_host"], str)
-        assert isinstance(data["mqtt_port"], int)
-        assert isinstance(data["mqtt_user"], str)
-        assert isinstance(data["wallbox_topic"], str)
-        assert isinstance(data["log_level"], int)
+    def test_config_returns_200(self, config_snapshot):
+        assert config_snapshot.status_code == 200
+
+    @pytest.mark.parametrize(
+        "key, typ",
+        [
+            ("mqtt_host", str),
+            ("mqtt_port", int),
+            ("mqtt_user", str),
+            ("wallbox_topic", str),
+            ("log_level", int),
+        ],
+    )
+    def test_config_field(self, config_data, key, typ):
+        assert key in config_data
+        assert isinstance(config_data[key], typ)
 
 
 # --- POST /api/config ---
 
 
+@pytest.mark.xdist_group("dut_mutation")
+@pytest.mark.isolate(timeout=20)
 class TestApiConfigPost:
-    def test_post_mqtt_config(self, base_url, original_config):
-        resp = requests.post(
-            f"{base_url}/api/config",
-            json={
-                "type": "mqtt",
-                "host": original_config["mqtt_host"],
-                "port": original_config["mqtt_port"],
-                "user": original_config["mqtt_user"],
-                "pass": "admin",
-            },
-            timeout=5,
-        )
+    @pytest.mark.parametrize(
+        "build, accepted",
+        [
+            pytest.param(
+                lambda cfg: {
+                    "type": "mqtt",
+                    "host": cfg["mqtt_host"],
+                    "port": cfg["mqtt_port"],
+                    "user": cfg["mqtt_user"],
+                    "pass": "admin",
+                },
+                ("ok", "error"),  # NVS may reject no-op writes
+                id="mqtt_config",
+            ),
+            pytest.param(
+                lambda cfg: {"type": "wallbox", "topic": cfg["wallbox_topic"]},
+                ("ok",),
+                id="wallbox_topic",
+            ),
+            pytest.param(
+                lambda cfg: {"type": "loglevel", "level": cfg["log_level"]},
+                ("ok",),
+                id="loglevel",
+            ),
+        ],
+    )
+    def test_post_current_value(
+        self, http, base_url, original_config, build, accepted
+    ):
+        """Write back the current value; /api/config takes one type per POST."""
+        resp = http.post(f"{base_url}/api/config", json=build(original_config))
         assert resp.status_code == 200
-        data = resp.json()
-        assert "status" in data
-        assert data["status"] in ("ok", "error")  # NVS may reject no-op writes
+        assert orjson.loads(resp.content).get("status") in accepted
 
-    def test_post_wallbox_topic(self, base_url, original_config):
-        resp = requests.post(
-            f"{base_url}/api/config",
-            json={"type": "wallbox", "topic": original_config["wallbox_topic"]},
-            timeout=5,
-        )
-        assert resp.status_code == 200
-        data = resp.json()
-        assert data["status"] == "ok"
-
-    def test_post_loglevel(self, base_url, original_config):
-        resp = requests.post(
-            f"{base_url}/api/config",
-            json={"type": "loglevel", "level": original_config["log_level"]},
-            timeout=5,
-        )
-        assert resp.status_code == 200
-        data = resp.json()
-        assert data["status"] == "ok"
-
-    def test_post_unknown_type(self, base_url):
-        resp = requests.post(
+    def test_post_unknown_type(self, http, base_url):
+        resp = http.post(
             f"{base_url}/api/config",
             json={"type": "nonexistent", "value": 42},
-            timeout=5,
         )
         assert resp.status_code == 200
-        data = resp.json()
+        data = orjson.loads(resp.content)
         assert data["status"] == "error"
 
-    def test_post_invalid_json(self, base_url):
-        resp = requests.post(
+    def test_post_invalid_json(self, http, base_url):
+        resp = http.post(
             f"{base_url}/api/config",
             data="{not valid json",
             headers={"Content-Type": "application/json"},
-            timeout=5,
         )
         assert resp.status_code == 400
 
@@ -168,131 +194,137 @@ class TestApiConfigPost:
 # --- POST /api/debug ---
 
 
+@pytest.mark.xdist_group("dut_mutation")
+@pytest.mark.usefixtures("exclusive_device")
 class TestApiDebug:
-    def test_debug_enable(self, base_url):
-        resp = requests.post(
+    @pytest.mark.replayable
+    def test_debug_enable(self, http, base_url):
+        resp = http.post(
             f"{base_url}/api/debug",
             json={"enabled": True},
-            timeout=5,
+            timeout=FAST_TIMEOUT,
         )
         assert resp.status_code == 200
-        data = resp.json()
+        data = orjson.loads(resp.content)
         assert data["status"] == "ok"
 
-    def test_debug_disable(self, base_url):
-        resp = requests.post(
+    @pytest.mark.replayable
+    def test_debug_disable(self, http, base_url):
+        resp = http.post(
             f"{base_url}/api/debug",
             json={"enabled": False},
-            timeout=5,
+            timeout=FAST_TIMEOUT,
         )
         assert resp.status_code == 200
-        data = resp.json()
+        data = orjson.loads(resp.content)
         assert data["status"] == "ok"
 
-    def test_debug_invalid_json(self, base_url):
-        resp = requests.post(
+    @pytest.mark.replayable
+    def test_debug_invalid_json(self, http, base_url):
+        resp = http.post(
             f"{base_url}/api/debug",
             data="not json",
             headers={"Content-Type": "application/json"},
-            timeout=5,
+            timeout=FAST_TIMEOUT,
         )
         assert resp.status_code == 400
 
-    def test_debug_verify_in_status(self, base_url):
-        import time
-
+    # Not replayable: its /api/status polls are the same request as every
+    # other status GET in the module, so replay would depend on test order
+    @pytest.mark.isolate(timeout=20)
+    def test_debug_verify_in_status(self, http, base_url, wait_for_status):
         # Enable debug
-        requests.post(
+        http.post(
             f"{base_url}/api/debug",
             json={"enabled": True},
-            timeout=5,
+            timeout=FAST_TIMEOUT,
         )
-        time.sleep(0.5)
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
+        data = wait_for_status("debug_mode", True, timeout=2)
         assert data["debug_mode"] is True
 
         # Disable debug
-        requests.post(
+        http.post(
             f"{base_url}/api/debug",
             json={"enabled": False},
-            timeout=5,
+            timeout=FAST_TIMEOUT,
         )
-        time.sleep(0.5)
-        resp = requests.get(f"{base_url}/api/status", timeout=5)
-        data = resp.json()
+        data = wait_for_status("debug_mode", False, timeout=2)
         assert data["debug_mode"] is False
 
 
 # --- 404 handler ---
 
 
+@pytest.mark.replayable
 class TestNotFound:
-    def test_nonexistent_path(self, base_url):
-        resp = requests.get(f"{base_url}/nonexistent", timeout=5)
+    def test_nonexistent_path(self, http, base_url):
+        resp = http.get_cacheable(f"{base_url}/nonexistent", timeout=FAST_TIMEOUT)
         assert resp.status_code == 404
 
 
 # --- OTA authorization ---
+# test_ota_mock.py covers every auth path against a local mock; the
+# wrong-password case also runs here so the device's own check is exercised.
 
 
+def _wait_for_restart(http, base_url, timeout=30):
+    """Wait for the device to drop off the network and answer again."""
+    deadline = time.monotonic() + timeout
+    went_down = False
+    while time.monotonic() < deadline:
+        try:
+            resp = http.get(f"{base_url}/ota/health", timeout=FAST_TIMEOUT)
+            up = resp.status_code == 200
+        except requests.RequestException:
+            up = False
+        if went_down and up:
+            return
+        went_down = went_down or not up
+        time.sleep(0.25)
+    pytest.fail(f"device did not come back within {timeout} s")
+
+
+@pytest.mark.xdist_group("dut_mutation")
 class TestOtaAuth:
-    def test_ota_health(self, base_url):
+    @pytest.mark.replayable
+    def test_ota_health(self, http, base_url):
         """OTA health check requires no auth."""
-        resp = requests.get(f"{base_url}/ota/health", timeout=5)
+        resp = http.get_cacheable(f"{base_url}/ota/health", timeout=FAST_TIMEOUT)
         assert resp.status_code == 200
-        data = resp.json()
+        data = orjson.loads(resp.content)
         assert data["status"] == "ok"
 
-    def test_ota_no_auth_rejected(self, base_url):
-        """OTA upload without auth header is rejected (update fails)."""
-        import io
+    @pytest.mark.timeout(45)
+    def test_ota_wrong_password_rejected(self, http, base_url):
+        """OTA upload with a wrong password never starts an update.
 
-        fake_fw = io.BytesIO(b"\x00" * 256)
-        resp = requests.post(
+        The completion handler only checks Update.hasError(). Without a
+        begin() no new error is set, so the device usually answers 200 and
+        restarts; a 500 means an earlier failed update left its error set.
+        """
+        resp = http.post(
             f"{base_url}/ota",
-            files={"firmware": ("firmware.bin", fake_fw)},
-            timeout=10,
+            files={"firmware": ("firmware.bin", FAKE_FIRMWARE)},
+            headers={"Authorization": "Bearer wrong_password"},
+            timeout=SLOW_TIMEOUT,
         )
-        # Without auth, upload handler skips Update.begin, so update has error
         assert resp.status_code in (200, 500)
-        data = resp.json()
+        data = orjson.loads(resp.content)
+        assert data["status"] == ("ok" if resp.status_code == 200 else "error")
         if resp.status_code == 200:
-            # Update.hasError() should be true since begin() was never called
-            assert data.get("status") in ("ok", "error")
+            _wait_for_restart(http, base_url)
 
-    def test_ota_wrong_password_rejected(self, base_url):
-        """OTA upload with wrong password is rejected (update fails)."""
-        import io
-
-        fake_fw = io.BytesIO(b"\x00" * 256)
-        try:
-            resp = requests.post(
-                f"{base_url}/ota",
-                files={"firmware": ("firmware.bin", fake_fw)},
-                headers={"Authorization": "Bearer wrong_password"},
-                timeout=10,
-            )
-            # Wrong auth, upload handler skips Update.begin
-            assert resp.status_code in (200, 500)
-        except requests.exceptions.ReadTimeout:
-            # Timeout is acceptable — ESP hung because Update never started
-            pass
-
-    def test_ota_correct_auth_invalid_firmware(self, base_url):
+    def test_ota_correct_auth_invalid_firmware(self, http, base_url):
         """OTA upload with correct auth but invalid firmware returns error."""
-        import io
-
-        fake_fw = io.BytesIO(b"\x00" * 256)
-        resp = requests.post(
+        resp = http.post(
             f"{base_url}/ota",
-            files={"firmware": ("firmware.bin", fake_fw)},
-            headers={"Authorization": "Bearer modbus_ota_2023"},
-            timeout=10,
+            files={"firmware": ("firmware.bin", FAKE_FIRMWARE)},
+            headers={"Authorization": f"Bearer {OTA_PASSWORD}"},
+            timeout=SLOW_TIMEOUT,
         )
         # Auth passes but firmware is invalid
         assert resp.status_code in (200, 500)
-        data = resp.json()
+        data = orjson.loads(resp.content)
         assert data["status"] in ("ok", "error")
 
 
@@ -301,6 +333,6 @@ class TestOtaAuth:
 
 class TestRestart:
     @pytest.mark.skip(reason="Causes device reboot - run manually if needed")
-    def test_restart(self, base_url):
-        resp = requests.post(f"{base_url}/api/restart", timeout=5)
+    def test_restart(self, http, base_url):
+        resp = http.post(f"{base_url}/api/restart")
         assert resp.status_code == 200
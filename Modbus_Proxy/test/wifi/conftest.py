@@ -8,6 +8,11 @@ Requires:
     - DUT (Modbus Proxy) powered and reachable on production network
     - Environment variables: ESP32_TESTER_PORT, DUT_IP (optional, have defaults)
 
+Parallel runs (pytest-xdist) need one tester + DUT bench per worker: give
+comma-separated lists, e.g. ESP32_TESTER_PORT=/dev/ttyACM0,/dev/ttyACM1 and
+DUT_IP=192.168.0.177,192.168.0.178, then run with -n 2 --dist loadgroup.
+Worker gwN uses entry N.
+
 Install driver:
     pip install -e <path-to-Universal-ESP32-Tester>/pytest
 """
@@ -19,6 +24,8 @@ import uuid
 
 import pytest
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Import will fail until wifi_tester_driver is installed from the Universal-ESP32-Tester repo
 try:
@@ -27,6 +34,70 @@ except ImportError:
     ESP32TesterDriver = None
 
 
+# ---------------------------------------------------------------------------
+# Command-line options
+# ---------------------------------------------------------------------------
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-slow",
+        action="store_true",
+        default=False,
+        help="run tests marked slow (multi-minute waits, e.g. portal timeout)",
+    )
+
+
+# tryfirst: xdist's loadgroup hook reads the xdist_group markers, so the
+# ones added here must be in place before it runs.
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_modifyitems(config, items):
+    _group_by_ap_ssid(items)
+    # Two benches broadcasting the same fixed SSID would let a DUT join the
+    # other bench's AP, so each fixed SSID is pinned to one xdist worker.
+    # An explicit xdist_group (e.g. the portal module's) is kept, so items
+    # sharing class- or module-scoped fixtures stay on one worker.
+    for item in items:
+        marker = item.get_closest_marker("wifi_ssid")
+        if marker is not None and item.get_closest_marker("xdist_group") is None:
+            item.add_marker(pytest.mark.xdist_group(f"ssid-{marker.args[0]}"))
+    if config.getoption("--run-slow"):
+        return
+    skip = pytest.mark.skip(reason="slow test, needs --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
+
+
+def _group_by_ap_ssid(items):
+    """Run tests marked wifi_ssid(<ssid>) back to back per SSID.
+
+    Each group moves up to where its first test was collected, but only
+    within its own class (or module, for plain functions), so no test
+    leaves the class whose fixtures it shares. Everything else keeps its
+    order. With the tester's AP cache, consecutive tests on the same SSID
+    then share one AP bring-up.
+    """
+
+    def _key(item, marker):
+        scope = item.getparent(pytest.Class) or item.getparent(pytest.Module)
+        return (scope.nodeid, marker.args[0])
+
+    first_index = {}
+    for index, item in enumerate(items):
+        marker = item.get_closest_marker("wifi_ssid")
+        if marker is not None:
+            first_index.setdefault(_key(item, marker), index)
+
+    def _position(indexed):
+        index, item = indexed
+        marker = item.get_closest_marker("wifi_ssid")
+        group = index if marker is None else first_index[_key(item, marker)]
+        return (group, index)
+
+    items[:] = [item for _, item in sorted(enumerate(items), key=_position)]
+
+
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
@@ -38,9 +109,17 @@ WIFI_CONNECT_TIMEOUT = 30  # DUT's WIFI_CONNECT_TIMEOUT_MS / 1000
 PORTAL_BOOT_THRESHOLD = 3  # reboots needed to trigger portal
 PORTAL_TIMEOUT_S = 300  # CAPTIVE_PORTAL_TIMEOUT_MS / 1000
 
+# Tester AP network (DHCP hands the DUT an address in this subnet)
+TEST_AP_IP = "192.168.4.1"
+TEST_AP_SUBNET = "192.168.4."
+
 # Test timing
 DUT_BOOT_TIME = 15  # seconds from reboot to WiFi connected
+STA_BEACON_TIMEOUT = 6  # ESP-IDF default: AP counted lost after 6s of no beacons
 FAILED_BOOT_CYCLE = WIFI_CONNECT_TIMEOUT + 5  # one failed boot cycle
+DUT_JOIN_TIMEOUT = DUT_BOOT_TIME + WIFI_CONNECT_TIMEOUT  # provision -> station
+DUT_RECOVERY_TIMEOUT = FAILED_BOOT_CYCLE + DUT_JOIN_TIMEOUT  # bad creds -> production
+NO_STATION_WINDOW = DUT_BOOT_TIME + DUT_JOIN_TIMEOUT  # negative station waits
 
 
 # ---------------------------------------------------------------------------
@@ -48,8 +127,64 @@ FAILED_BOOT_CYCLE = WIFI_CONNECT_TIMEOUT + 5  # one failed boot cycle
 # ---------------------------------------------------------------------------
 
 
+def _bench_setting(config, env_var, default):
+    """This xdist worker's entry from a comma-separated env var (gwN -> N)."""
+    values = [v.strip() for v in os.environ.get(env_var, default).split(",")]
+    worker = getattr(config, "workerinput", {}).get("workerid", "gw0")
+    index = int(worker[2:])
+    if index >= len(values):
+        pytest.skip(f"no {env_var} entry for xdist worker {worker}")
+    return values[index]
+
+
+class _ESP32Tester:
+    """Driver proxy that remembers which AP is running.
+
+    ap_start() with the credentials of the AP that is already up returns
+    immediately instead of cycling the AP (several seconds each time).
+    Everything else is forwarded to the driver. wait_for_station() is left
+    to the driver: the tester firmware runs the AP itself and reports
+    station association over serial, there is no host-side hostapd whose
+    control socket could be attached to.
+    """
+
+    def __init__(self, driver):
+        self._driver = driver
+        self._current_ap = None
+        self._ap_info = None
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    def ap_start(self, ssid, password):
+        if self._current_ap != (ssid, password):
+            self._ap_info = self._driver.ap_start(ssid, password)
+            self._current_ap = (ssid, password)
+        return self._ap_info
+
+    def ap_stop(self):
+        self._current_ap = None
+        return self._driver.ap_stop()
+
+    def expect_no_station(self):
+        """Fail if the DUT joins the AP within NO_STATION_WINDOW.
+
+        The window is fixed: a reboot plus a full DUT_JOIN_TIMEOUT, so a
+        slow join cannot slip past it. The driver's timeout exception is
+        not a documented type, so the verdict comes from ap_status(),
+        which raises on its own if the serial link has failed.
+        """
+        try:
+            station = self._driver.wait_for_station(timeout=NO_STATION_WINDOW)
+        except Exception:
+            station = None
+        stations = self._driver.ap_status()["stations"]
+        if station or stations:
+            pytest.fail(f"DUT joined the AP unexpectedly: {station or stations}")
+
+
 @pytest.fixture(scope="session")
-def esp32_tester():
+def esp32_tester(pytestconfig):
     """Session-scoped connection to the Universal ESP32 Tester instrument."""
     if ESP32TesterDriver is None:
         pytest.skip(
@@ -57,16 +192,16 @@ def esp32_tester():
             "Install from Universal-ESP32-Tester repo: pip install -e <path>/pytest"
         )
 
-    port = os.environ.get("ESP32_TESTER_PORT", "/dev/ttyACM0")
+    port = _bench_setting(pytestconfig, "ESP32_TESTER_PORT", "/dev/ttyACM0")
     driver = ESP32TesterDriver(port)
     driver.open()
 
     info = driver.ping()
     print(f"ESP32 Tester connected: {info}")
 
-    yield driver
+    yield _ESP32Tester(driver)
 
-    # Cleanup: stop any running AP
+    # Cleanup: stop any running AP (test AP fixtures leave it up)
     try:
         driver.ap_stop()
     except Exception:
@@ -75,9 +210,9 @@ def esp32_tester():
 
 
 @pytest.fixture(scope="session")
-def dut_production_ip():
+def dut_production_ip(pytestconfig):
     """DUT IP address on the production network."""
-    return os.environ.get("DUT_IP", "192.168.0.177")
+    return _bench_setting(pytestconfig, "DUT_IP", "192.168.0.177")
 
 
 @pytest.fixture(scope="session")
@@ -92,22 +227,51 @@ def dut_production_url(dut_production_ip):
 
 
 @pytest.fixture
-def wifi_network(esp32_tester):
-    """Start a fresh test AP, stop on teardown. Yields network info dict."""
+def wifi_network(dut_on_production, esp32_tester):
+    """Start a fresh test AP. Yields network info dict.
+
+    Depends on dut_on_production so a parked DUT is released (which restarts
+    the parking AP) before this AP comes up, not after. Like test_ap, the AP
+    is left running for the next ap_start() to replace.
+    """
     ssid = f"TEST-{uuid.uuid4().hex[:6].upper()}"
     password = "testpass123"
     esp32_tester.ap_start(ssid, password)
-    yield {"ssid": ssid, "password": password, "ap_ip": "192.168.4.1"}
-    esp32_tester.ap_stop()
+    return {"ssid": ssid, "password": password, "ap_ip": TEST_AP_IP}
+
+
+@pytest.fixture
+def provision_dut(dut_on_production, dut_production_url):
+    """Factory: send WiFi credentials to the DUT on the production network."""
+
+    def _provision(ssid, password):
+        _provision_dut_wifi(dut_production_url, ssid, password)
+
+    return _provision
 
 
 @pytest.fixture
-def open_wifi_network(esp32_tester):
-    """Start an open (no password) test AP, stop on teardown."""
+def test_ap(esp32_tester):
+    """Factory: bring up the tester AP with the given credentials.
+
+    The AP is left running: the next ap_start() replaces it, an identical
+    one is reused, and the session teardown stops whatever is left.
+    """
+
+    def _start(ssid, password):
+        esp32_tester.ap_start(ssid, password)
+        return {"ssid": ssid, "password": password, "ap_ip": TEST_AP_IP}
+
+    return _start
+
+
+@pytest.fixture
+def open_wifi_network(dut_on_production, esp32_tester):
+    """Start an open (no password) test AP; ordered and left running like
+    wifi_network."""
     ssid = f"OPEN-{uuid.uuid4().hex[:6].upper()}"
     esp32_tester.ap_start(ssid, "")
-    yield {"ssid": ssid, "password": "", "ap_ip": "192.168.4.1"}
-    esp32_tester.ap_stop()
+    return {"ssid": ssid, "password": "", "ap_ip": TEST_AP_IP}
 
 
 # ---------------------------------------------------------------------------
@@ -115,6 +279,27 @@ def open_wifi_network(esp32_tester):
 # ---------------------------------------------------------------------------
 
 
+# Keep-alive session for one-shot GETs to the DUT on the production network,
+# mounted like the integration suite's http fixture; a pooled socket left
+# dead by a DUT reboot is retried on a new connection. urllib3 does not
+# retry a POST once it is sent, so _provision_dut_wifi() opens a fresh
+# connection instead. The polling helpers below use plain requests too:
+# their failed probes are expected, and retries would only delay them.
+_production_http = requests.Session()
+_production_http.mount(
+    "http://",
+    HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=2,
+        max_retries=Retry(total=2, backoff_factor=0.1),
+    ),
+)
+
+
+def pytest_unconfigure(config):
+    _production_http.close()
+
+
 def _provision_dut_wifi(base_url, ssid, password, timeout=5):
     """Tell the DUT to switch to new WiFi credentials. DUT will reboot."""
     requests.post(
@@ -126,81 +311,290 @@ def _provision_dut_wifi(base_url, ssid, password, timeout=5):
 
 def _get_dut_status(base_url, timeout=5):
     """Get DUT /api/status."""
-    resp = requests.get(f"{base_url}/api/status", timeout=timeout)
+    resp = _production_http.get(f"{base_url}/api/status", timeout=timeout)
     return resp.json()
 
 
-def _wait_for_dut_on_production(dut_production_url, timeout=60):
-    """Poll until DUT is reachable on production network."""
+def _wait_for_dut_on_production(dut_production_url, timeout=60, interval=0.25):
+    """Poll until DUT is reachable on production network.
+
+    Short probes at a short interval: the DUT answers within ms once its
+    web server is up, so the poll cadence is what sets how late the
+    return comes.
+    """
     deadline = time.time() + timeout
     while time.time() < deadline:
         try:
-            resp = requests.get(
-                f"{dut_production_url}/api/status", timeout=3
-            )
+            resp = requests.get(f"{dut_production_url}/api/status", timeout=1)
             if resp.status_code == 200:
                 return resp.json()
-        except requests.exceptions.RequestException:
+        except (requests.exceptions.RequestException, ValueError):
             pass
-        time.sleep(2)
+        time.sleep(interval)
     raise TimeoutError("DUT did not come back on production network")
 
 
+def _wait_for_reboot(base_url, timeout=60, interval=0.25):
+    """Wait for the DUT to drop off base_url and then answer again.
+
+    Returns the status it comes back with. Uptime is no proof of a
+    reboot: after failed NVS credentials connectWiFi() falls back to
+    credentials.h within the same boot, so millis() keeps counting.
+    """
+    deadline = time.time() + timeout
+    while True:
+        try:
+            resp = requests.get(f"{base_url}/api/status", timeout=1)
+            if resp.status_code != 200:
+                break
+        except requests.exceptions.RequestException:
+            break
+        if time.time() >= deadline:
+            raise TimeoutError(f"DUT at {base_url} never went offline")
+        time.sleep(interval)
+    return _wait_for_dut_on_production(
+        base_url, timeout=max(deadline - time.time(), 0), interval=interval
+    )
+
+
+def _wait_for_dut_offline(tester, dut_ip, timeout=10):
+    """Poll the DUT through the tester until it stops answering (rebooting).
+
+    Used after /api/restart so a following wait_for_station() sees the
+    re-association rather than the station that is about to drop.
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            resp = tester.http_get(f"http://{dut_ip}/api/status", timeout=2)
+            if resp.status_code != 200:
+                return
+        except Exception:
+            return
+        time.sleep(0.5)
+
+
+def _ssids(scan_result):
+    """Set of SSIDs in a tester scan result."""
+    return {n["ssid"] for n in scan_result.get("networks", [])}
+
+
+def _wait_for_ssid(tester, ssid, timeout, interval=2):
+    """Wait until ssid is broadcasting. Returns a scan result that contains it.
+
+    Uses the tester's passive wait_for_beacon() when the installed driver
+    has it (detects the beacon within ~1s instead of one ~2s active scan
+    per poll), then scans until a result lists the SSID; without it,
+    scans periodically from the start.
+    """
+    deadline = time.time() + timeout
+    wait_for_beacon = getattr(tester, "wait_for_beacon", None)
+    if wait_for_beacon is not None and not wait_for_beacon(ssid, timeout=timeout):
+        raise TimeoutError(f"No beacon from SSID '{ssid}' within {timeout}s")
+
+    while True:
+        scan_result = tester.scan()
+        visible = _ssids(scan_result)
+        if ssid in visible:
+            return scan_result
+        if time.time() >= deadline:
+            raise TimeoutError(
+                f"SSID '{ssid}' not seen within {timeout}s. "
+                f"Visible networks: {sorted(visible)}"
+            )
+        time.sleep(interval)
+
+
 # ---------------------------------------------------------------------------
 # DUT on test AP fixture
 # ---------------------------------------------------------------------------
 
 
+class _DutParking:
+    """Keeps the DUT joined to one per-session test AP between tests.
+
+    join() provisions the DUT only when it is not already parked there
+    (checked with one relay GET), so consecutive dut_on_test_ap tests
+    share a single provision + join. A test that moves the DUT away
+    (factory reset, failed probe) simply triggers a fresh provision on
+    the next join(). release() sends the DUT back to production; fixtures
+    that need it there call ensure_on_production() before touching it.
+    """
+
+    def __init__(self, tester, dut_production_url):
+        self._tester = tester
+        self._production_url = dut_production_url
+        self.ssid = f"TEST-{uuid.uuid4().hex[:6].upper()}"
+        self.password = "testpass123"
+        self._station = None
+        self._original_ssid = ""
+
+    def _still_parked(self):
+        try:
+            resp = self._tester.http_get(
+                f"http://{self._station['ip']}/api/status", timeout=2
+            )
+            return resp.status_code == 200 and resp.json()["wifi_ssid"] == self.ssid
+        except Exception:
+            return False
+
+    def join(self):
+        self._tester.ap_start(self.ssid, self.password)
+        if self._station is not None:
+            if self._still_parked():
+                return self._station
+            # Stale: the last test moved the DUT away or restarted the AP
+            self._station = None
+            try:
+                _wait_for_dut_on_production(self._production_url, timeout=60)
+            except TimeoutError:
+                # Not on production either, so still on (or rejoining) the
+                # test AP: provision it again from there
+                return self._reprovision_via_relay()
+
+        # Record original SSID for restore
+        try:
+            original_status = _get_dut_status(self._production_url)
+            self._original_ssid = original_status.get("wifi_ssid", "")
+        except Exception:
+            self._original_ssid = ""
+
+        # Tell DUT to connect to test AP (DUT reboots) and wait for it
+        _provision_dut_wifi(self._production_url, self.ssid, self.password)
+        self._station = self._tester.wait_for_station(timeout=DUT_JOIN_TIMEOUT)
+        return self._station
+
+    def _reprovision_via_relay(self):
+        station = self._tester.wait_for_station(timeout=DUT_JOIN_TIMEOUT)
+        self._tester.http_post(
+            f"http://{station['ip']}/api/wifi",
+            json={"ssid": self.ssid, "password": self.password},
+        )
+        _wait_for_dut_offline(self._tester, station["ip"])
+        self._station = self._tester.wait_for_station(timeout=DUT_JOIN_TIMEOUT)
+        return self._station
+
+    def repark(self, station):
+        """Record the station the DUT rejoined with after an AP restart."""
+        if self._station is not None:
+            self._station = station
+
+    def release(self):
+        if self._station is None:
+            return
+        station, self._station = self._station, None
+
+        # Restore: tell DUT to go back to production network
+        try:
+            self._tester.ap_start(self.ssid, self.password)
+            self._tester.http_post(
+                f"http://{station['ip']}/api/wifi",
+                json={"ssid": self._original_ssid, "password": ""},
+            )
+        except Exception:
+            pass
+
+        # Wait for DUT to reappear on production network
+        try:
+            _wait_for_dut_on_production(self._production_url, timeout=60)
+        except TimeoutError:
+            # DUT will eventually fall back to credentials.h
+            pass
+
+    def ensure_on_production(self):
+        """release(), then wait until the DUT answers on production.
+
+        A negative test may end while the DUT is still trying bad NVS
+        credentials; the next provisioning POST must not hit it then.
+        """
+        self.release()
+        _wait_for_dut_on_production(self._production_url, timeout=DUT_RECOVERY_TIMEOUT)
+
+
+@pytest.fixture(scope="session")
+def dut_parking(esp32_tester, dut_production_url):
+    """Session-wide _DutParking; the DUT is sent home at session end."""
+    parking = _DutParking(esp32_tester, dut_production_url)
+    yield parking
+    parking.release()
+
+
+@pytest.fixture
+def dut_on_production(dut_parking):
+    """Make sure the DUT is on the production network, not parked on a test AP."""
+    dut_parking.ensure_on_production()
+
+
 @pytest.fixture
-def dut_on_test_ap(esp32_tester, wifi_network, dut_production_url):
-    """Provision the DUT onto the test AP and wait for connection.
+def dut_on_test_ap(dut_parking):
+    """Get the DUT onto the session's test AP, provisioning only if needed.
 
     Yields a dict with:
         - ip: DUT's IP on the test network
         - ssid: test AP SSID
         - password: test AP password
 
-    On teardown, restores DUT to production network credentials.
+    The DUT stays on the test AP afterwards for the next test; the session
+    teardown (or the next dut_on_production user) restores it.
     """
-    # Record original SSID for restore
-    try:
-        original_status = _get_dut_status(dut_production_url)
-        original_ssid = original_status.get("wifi_ssid", "")
-    except Exception:
-        original_ssid = ""
+    station = dut_parking.join()
+    return {
+        "ip": station["ip"],
+        "ssid": dut_parking.ssid,
+        "password": dut_parking.password,
+    }
 
-    # Tell DUT to connect to test AP (DUT reboots)
-    _provision_dut_wifi(
-        dut_production_url,
-        wifi_network["ssid"],
-        wifi_network["password"],
-    )
 
-    # Wait for DUT to connect to our AP
-    station = esp32_tester.wait_for_station(timeout=DUT_BOOT_TIME + WIFI_CONNECT_TIMEOUT)
-    dut_ip = station["ip"]
+@pytest.fixture
+def restore_dut(esp32_tester):
+    """Factory: register a station for restore on teardown.
 
-    yield {
-        "ip": dut_ip,
-        "ssid": wifi_network["ssid"],
-        "password": wifi_network["password"],
-    }
+    Tests that provision the DUT onto a tester AP themselves pass the
+    station from wait_for_station(). On teardown, even after a failed
+    assertion, each one is sent empty credentials so the DUT falls back
+    to credentials.h instead of staying on the test AP.
+    """
+    stations = []
+    yield stations.append
+    for station in stations:
+        try:
+            esp32_tester.http_post(
+                f"http://{station['ip']}/api/wifi",
+                json={"ssid": "", "password": ""},
+            )
+        except Exception:
+            pass
 
-    # Restore: tell DUT to go back to production network
-    try:
-        esp32_tester.http_post(
-            f"http://{dut_ip}/api/wifi",
-            json={"ssid": original_ssid, "password": ""},
-        )
-    except Exception:
-        pass
 
-    # Wait for DUT to reappear on production network
-    try:
-        _wait_for_dut_on_production(dut_production_url, timeout=60)
-    except TimeoutError:
-        # DUT will eventually fall back to credentials.h
-        pass
+@pytest.fixture
+def restore_test_ap(dut_on_test_ap, dut_parking, esp32_tester):
+    """Bring back the dut_on_test_ap AP after a test that replaced it.
+
+    Waits for the DUT to rejoin so it is still parked there for the next test.
+    The replacement AP differs in SSID or password, so ap_start() alone
+    switches over without a separate ap_stop().
+    """
+    yield
+    esp32_tester.ap_start(dut_on_test_ap["ssid"], dut_on_test_ap["password"])
+    dut_parking.repark(esp32_tester.wait_for_station(timeout=60))
+
+
+@pytest.fixture
+def ap_dropout(dut_on_test_ap, dut_parking, esp32_tester):
+    """Factory: take the test AP down for some seconds, bring it back and
+    return the station once the DUT has rejoined."""
+    stations = []
+
+    def _dropout(seconds, timeout=30):
+        esp32_tester.ap_stop()
+        time.sleep(seconds)
+        esp32_tester.ap_start(dut_on_test_ap["ssid"], dut_on_test_ap["password"])
+        stations.append(esp32_tester.wait_for_station(timeout=timeout))
+        return stations[-1]
+
+    yield _dropout
+    if stations:
+        dut_parking.repark(stations[-1])
 
 
 # ---------------------------------------------------------------------------
@@ -209,20 +603,52 @@ def dut_on_test_ap(esp32_tester, wifi_network, dut_production_url):
 
 
 class DUTHttpClient:
-    """HTTP client that routes requests through the ESP32 Tester serial relay."""
+    """HTTP client that routes requests through the ESP32 Tester serial relay.
+
+    Each relay round trip costs several hundred ms, so a plain GET is
+    answered from a short-lived per-path cache; any POST clears it.
+    """
+
+    CACHE_TTL = 0.2  # seconds
 
     def __init__(self, tester, dut_ip):
         self._tester = tester
         self._dut_ip = dut_ip
+        self._cache = {}  # path -> (monotonic time, response)
 
     @property
     def base_url(self):
         return f"http://{self._dut_ip}"
 
     def get(self, path, **kwargs):
-        return self._tester.http_get(f"{self.base_url}{path}", **kwargs)
+        if kwargs:
+            return self._tester.http_get(f"{self.base_url}{path}", **kwargs)
+        cached = self._cache.get(path)
+        if cached is not None and time.monotonic() - cached[0] < self.CACHE_TTL:
+            return cached[1]
+        resp = self._tester.http_get(f"{self.base_url}{path}")
+        self._cache[path] = (time.monotonic(), resp)
+        return resp
+
+    def get_many(self, paths):
+        """GET several paths, returning {path: response}.
+
+        With a driver that has http_get_many() the GETs share one serial
+        round trip; otherwise they are issued one after another. Not from
+        threads: the driver runs one command at a time on a single serial
+        port, and concurrent calls would interleave on the wire.
+        """
+        get_many = getattr(self._tester, "http_get_many", None)
+        if get_many is None:
+            return {path: self.get(path) for path in paths}
+        responses = get_many([f"{self.base_url}{path}" for path in paths])
+        now = time.monotonic()
+        for path, resp in zip(paths, responses):
+            self._cache[path] = (now, resp)
+        return dict(zip(paths, responses))
 
     def post(self, path, json=None, **kwargs):
+        self._cache.clear()
         return self._tester.http_post(f"{self.base_url}{path}", json=json, **kwargs)
 
 
@@ -237,59 +663,41 @@ def dut_http(esp32_tester, dut_on_test_ap):
 # ---------------------------------------------------------------------------
 
 
-@pytest.fixture
-def dut_in_portal_mode(esp32_tester, wifi_network, dut_production_url):
-    """Trigger the DUT's captive portal mode by causing 3 failed WiFi boots.
-
-    Prerequisites: DUT is currently on production network.
+def _enter_portal_mode(tester, dut_production_url, ssid, password):
+    """Provision the DUT with an SSID that is not broadcasting and wait for
+    the portal AP to appear after PORTAL_BOOT_THRESHOLD failed boots.
 
-    Steps:
-        1. Provision DUT with test AP's SSID (but AP is stopped)
-        2. DUT reboots and fails WiFi 3 times
-        3. DUT enters captive portal mode
-
-    Yields the portal SSID.
-
-    On teardown, waits for portal timeout or restores DUT via portal.
+    Returns {"ssid": PORTAL_SSID, "scan": <scan result that saw the portal>}.
     """
     # Stop AP so DUT's WiFi will fail
-    esp32_tester.ap_stop()
+    tester.ap_stop()
 
     # Provision DUT with our SSID — DUT will reboot and fail
-    _provision_dut_wifi(
-        dut_production_url,
-        wifi_network["ssid"],
-        wifi_network["password"],
-    )
-
-    # Wait for 3 failed boot cycles
-    # Each cycle: ~30s WiFi timeout + ~5s boot overhead
-    wait_time = FAILED_BOOT_CYCLE * PORTAL_BOOT_THRESHOLD + 10
-    print(f"Waiting {wait_time}s for {PORTAL_BOOT_THRESHOLD} failed boot cycles...")
-    time.sleep(wait_time)
+    _provision_dut_wifi(dut_production_url, ssid, password)
 
-    # Verify portal AP is broadcasting
-    scan_result = esp32_tester.scan()
-    portal_found = any(
-        n["ssid"] == PORTAL_SSID for n in scan_result.get("networks", [])
-    )
-    if not portal_found:
+    # Wait for 3 failed boot cycles, each ~30s WiFi timeout + ~5s boot
+    # overhead; scan until the portal AP shows up instead of sleeping
+    # through the worst case.
+    wait_time = FAILED_BOOT_CYCLE * PORTAL_BOOT_THRESHOLD + 30
+    print(f"Waiting up to {wait_time}s for {PORTAL_BOOT_THRESHOLD} failed boot cycles...")
+    try:
+        scan_result = _wait_for_ssid(tester, PORTAL_SSID, timeout=wait_time)
+    except TimeoutError as exc:
         pytest.fail(
-            f"Portal SSID '{PORTAL_SSID}' not found in scan after "
-            f"{PORTAL_BOOT_THRESHOLD} failed boots. "
-            f"Visible networks: {[n['ssid'] for n in scan_result.get('networks', [])]}"
+            f"Portal not active after {PORTAL_BOOT_THRESHOLD} failed boots: {exc}"
         )
+    return {"ssid": PORTAL_SSID, "scan": scan_result}
 
-    yield PORTAL_SSID
 
-    # Teardown: provision DUT back to production via the portal
+def _leave_portal_mode(tester, dut_production_url):
+    """Provision the DUT back to production via the portal and wait for it."""
     try:
-        esp32_tester.sta_join(PORTAL_SSID, timeout=10)
-        esp32_tester.http_post(
+        tester.sta_join(PORTAL_SSID, timeout=10)
+        tester.http_post(
             f"http://{PORTAL_IP}/api/wifi",
             json={"ssid": "", "password": ""},  # empty = use credentials.h fallback
         )
-        esp32_tester.sta_leave()
+        tester.sta_leave()
     except Exception:
         pass
 
@@ -298,3 +706,54 @@ def dut_in_portal_mode(esp32_tester, wifi_network, dut_production_url):
         _wait_for_dut_on_production(dut_production_url, timeout=PORTAL_TIMEOUT_S + 30)
     except TimeoutError:
         pass
+
+
+@pytest.fixture
+def dut_in_portal_mode(
+    dut_on_production, esp32_tester, wifi_network, dut_production_url
+):
+    """Trigger the DUT's captive portal mode by causing 3 failed WiFi boots.
+
+    Prerequisites: DUT is currently on production network.
+
+    Steps:
+        1. Provision DUT with test AP's SSID (but AP is stopped)
+        2. DUT reboots and fails WiFi 3 times
+        3. DUT enters captive portal mode
+
+    Yields {"ssid": PORTAL_SSID, "scan": scan_result}; "scan" is the scan
+    that found the portal, so tests need not scan again.
+
+    On teardown, waits for portal timeout or restores DUT via portal.
+    Use this for tests that provision through the portal or let it time out.
+    """
+    portal = _enter_portal_mode(
+        esp32_tester,
+        dut_production_url,
+        wifi_network["ssid"],
+        wifi_network["password"],
+    )
+    yield portal
+    _leave_portal_mode(esp32_tester, dut_production_url)
+
+
+@pytest.fixture(scope="class")
+def dut_in_portal_mode_shared(esp32_tester, dut_parking, dut_production_url):
+    """Class-scoped dut_in_portal_mode for tests that only read from the portal.
+
+    One portal activation (~2 min) serves every test in the class. The
+    SSID is never started, so no test AP is needed.
+    """
+    dut_parking.ensure_on_production()
+    ssid = f"TEST-{uuid.uuid4().hex[:6].upper()}"
+    portal = _enter_portal_mode(esp32_tester, dut_production_url, ssid, "testpass123")
+    yield portal
+    _leave_portal_mode(esp32_tester, dut_production_url)
+
+
+@pytest.fixture(scope="class")
+def portal_session(esp32_tester, dut_in_portal_mode_shared):
+    """Keep the tester joined to the portal AP for the whole class."""
+    esp32_tester.sta_join(dut_in_portal_mode_shared["ssid"], timeout=10)
+    yield dut_in_portal_mode_shared
+    esp32_tester.sta_leave()
@@ -3,10 +3,10 @@
 Verify the DUT connects to a test AP, gets DHCP, and basic services work.
 """
 
-import time
-
 import pytest
 
+from conftest import DUT_JOIN_TIMEOUT, TEST_AP_SUBNET, _wait_for_dut_offline
+
 
 pytestmark = pytest.mark.wifi
 
@@ -24,7 +24,7 @@ class TestWiFiConnection:
 
     def test_dhcp_address_assigned(self, dut_on_test_ap, dut_http):
         """WIFI-101: DUT gets a DHCP address in the 192.168.4.x range."""
-        assert dut_on_test_ap["ip"].startswith("192.168.4.")
+        assert dut_on_test_ap["ip"].startswith(TEST_AP_SUBNET)
 
         resp = dut_http.get("/api/status")
         data = resp.json()
@@ -54,51 +54,28 @@ class TestWiFiConnection:
         assert "wifi_connected" in data
         assert "mqtt_connected" in data
 
-    def test_connect_wpa2(self, esp32_tester, dut_production_url):
+    @pytest.mark.wifi_ssid("WPA2-TEST")
+    def test_connect_wpa2(self, test_ap, esp32_tester, provision_dut, restore_dut):
         """WIFI-105: DUT connects to WPA2-secured AP."""
-        ssid = "WPA2-TEST"
-        password = "secure_password_123"
-        esp32_tester.ap_start(ssid, password)
-
-        try:
-            from conftest import _provision_dut_wifi
-            _provision_dut_wifi(dut_production_url, ssid, password)
-            station = esp32_tester.wait_for_station(timeout=45)
-            assert station["ip"].startswith("192.168.4.")
-        finally:
-            # Restore DUT to production network
-            try:
-                esp32_tester.http_post(
-                    f"http://{station['ip']}/api/wifi",
-                    json={"ssid": "", "password": ""},
-                )
-            except Exception:
-                pass
-            esp32_tester.ap_stop()
+        ap = test_ap("WPA2-TEST", "secure_password_123")
+
+        provision_dut(ap["ssid"], ap["password"])
+        station = esp32_tester.wait_for_station(timeout=DUT_JOIN_TIMEOUT)
+        restore_dut(station)
+        assert station["ip"].startswith(TEST_AP_SUBNET)
 
     def test_connect_open_network(
-        self, esp32_tester, open_wifi_network, dut_production_url
+        self, esp32_tester, open_wifi_network, provision_dut, restore_dut
     ):
         """WIFI-106: DUT connects to an open (no password) network."""
-        from conftest import _provision_dut_wifi, _wait_for_dut_on_production
-
-        _provision_dut_wifi(
-            dut_production_url,
+        provision_dut(
             open_wifi_network["ssid"],
             open_wifi_network["password"],
         )
 
-        station = esp32_tester.wait_for_station(timeout=45)
-        assert station["ip"].startswith("192.168.4.")
-
-        # Restore
-        try:
-            esp32_tester.http_post(
-                f"http://{station['ip']}/api/wifi",
-                json={"ssid": "", "password": ""},
-            )
-        except Exception:
-            pass
+        station = esp32_tester.wait_for_station(timeout=DUT_JOIN_TIMEOUT)
+        restore_dut(station)
+        assert station["ip"].startswith(TEST_AP_SUBNET)
 
     def test_boot_counter_resets_on_success(self, dut_on_test_ap, dut_http, esp32_tester):
         """WIFI-107: Boot counter resets after successful WiFi connection.
@@ -108,10 +85,10 @@ class TestWiFiConnection:
         """
         # Restart DUT
         dut_http.post("/api/restart")
-        time.sleep(5)
+        _wait_for_dut_offline(esp32_tester, dut_on_test_ap["ip"])
 
         # Wait for DUT to reconnect to our AP
-        station = esp32_tester.wait_for_station(timeout=45)
+        station = esp32_tester.wait_for_station(timeout=DUT_JOIN_TIMEOUT)
 
         # Verify DUT is in normal mode (not portal)
         resp = esp32_tester.http_get(f"http://{station['ip']}/api/status")
@@ -3,10 +3,10 @@
 Verify the DUT handles bad WiFi credentials gracefully.
 """
 
-import time
-
 import pytest
 
+from conftest import DUT_JOIN_TIMEOUT, TEST_AP_SUBNET, _wait_for_reboot
+
 
 pytestmark = pytest.mark.wifi
 
@@ -14,81 +14,55 @@ pytestmark = pytest.mark.wifi
 class TestInvalidCredentials:
     """WIFI-300 to WIFI-303: Invalid credential handling."""
 
-    def test_wrong_password(self, esp32_tester, dut_production_url):
-        """WIFI-300: DUT fails gracefully with wrong password."""
-        ssid = "SECURED-NET"
-        esp32_tester.ap_start(ssid, "correct_password")
-
-        try:
-            # Provision DUT with wrong password
-            from conftest import _provision_dut_wifi
-            _provision_dut_wifi(dut_production_url, ssid, "wrong_password")
-
-            # DUT should NOT connect
-            with pytest.raises(Exception):
-                esp32_tester.wait_for_station(timeout=35)
-        finally:
-            esp32_tester.ap_stop()
-            # DUT will eventually fall back to credentials.h and rejoin production
-
-    def test_wrong_ssid(self, esp32_tester, dut_production_url):
+    # One WPA2 AP for every rejected-password case, so the cached AP is
+    # started once for all of them.
+    SECURED_AP = ("SECURED-NET", "correct_password")
+
+    @pytest.mark.wifi_ssid(SECURED_AP[0])
+    @pytest.mark.parametrize(
+        "password",
+        [
+            pytest.param("wrong_password", id="wrong_password"),  # WIFI-300
+            pytest.param("", id="empty_password"),  # WIFI-302
+        ],
+    )
+    def test_rejected_password(self, test_ap, esp32_tester, provision_dut, password):
+        """WIFI-300, WIFI-302: DUT fails gracefully with a bad WPA2 password."""
+        ap = test_ap(*self.SECURED_AP)
+
+        provision_dut(ap["ssid"], password)
+
+        # DUT should NOT connect
+        esp32_tester.expect_no_station()
+        # DUT will eventually fall back to credentials.h and rejoin production
+
+    def test_wrong_ssid(self, esp32_tester, dut_production_url, provision_dut):
         """WIFI-301: DUT fails gracefully with nonexistent SSID."""
         # Provision DUT with SSID that doesn't exist
-        from conftest import _provision_dut_wifi
-        _provision_dut_wifi(dut_production_url, "NONEXISTENT-NETWORK-XYZ", "password")
+        provision_dut("NONEXISTENT-NETWORK-XYZ", "password")
 
-        # No AP to connect to — DUT will reboot after timeout
-        time.sleep(40)
-
-        # DUT should eventually come back on production network
+        # No AP to connect to — DUT drops off while it reboots and tries
+        # the NVS creds, then comes back on the production network
         # (falls back to credentials.h after failed NVS creds)
-        from conftest import _wait_for_dut_on_production
-        _wait_for_dut_on_production(dut_production_url, timeout=120)
+        _wait_for_reboot(dut_production_url, timeout=160)
+
+    @pytest.mark.wifi_ssid("RECOVERY-NET")
+    def test_correct_creds_after_bad(
+        self, test_ap, esp32_tester, dut_production_url, provision_dut, restore_dut
+    ):
+        """WIFI-303: DUT connects after correcting bad credentials."""
+        ap = test_ap("RECOVERY-NET", "correct_pass_123")
 
-    def test_empty_password_for_wpa2(self, esp32_tester, dut_production_url):
-        """WIFI-302: DUT fails auth when WPA2 AP gets empty password."""
-        ssid = "WPA2-NET"
-        esp32_tester.ap_start(ssid, "real_password_123")
+        # First: provision with wrong password
+        provision_dut(ap["ssid"], "bad_password")
 
-        try:
-            from conftest import _provision_dut_wifi
-            _provision_dut_wifi(dut_production_url, ssid, "")
+        # DUT reboots, fails and falls back to production network
+        _wait_for_reboot(dut_production_url, timeout=160)
 
-            # DUT should NOT connect (empty password for WPA2)
-            with pytest.raises(Exception):
-                esp32_tester.wait_for_station(timeout=35)
-        finally:
-            esp32_tester.ap_stop()
+        # Now provision with correct password
+        provision_dut(ap["ssid"], ap["password"])
 
-    def test_correct_creds_after_bad(self, esp32_tester, dut_production_url):
-        """WIFI-303: DUT connects after correcting bad credentials."""
-        ssid = "RECOVERY-NET"
-        password = "correct_pass_123"
-        esp32_tester.ap_start(ssid, password)
-
-        try:
-            # First: provision with wrong password
-            from conftest import _provision_dut_wifi
-            _provision_dut_wifi(dut_production_url, ssid, "bad_password")
-
-            # DUT fails and reboots
-            time.sleep(40)
-
-            # DUT falls back to production network
-            from conftest import _wait_for_dut_on_production
-            _wait_for_dut_on_production(dut_production_url, timeout=120)
-
-            # Now provision with correct password
-            _provision_dut_wifi(dut_production_url, ssid, password)
-
-            # DUT should connect
-            station = esp32_tester.wait_for_station(timeout=45)
-            assert station["ip"].startswith("192.168.4.")
-
-            # Restore to production
-            esp32_tester.http_post(
-                f"http://{station['ip']}/api/wifi",
-                json={"ssid": "", "password": ""},
-            )
-        finally:
-            esp32_tester.ap_stop()
+        # DUT should connect
+        station = esp32_tester.wait_for_station(timeout=DUT_JOIN_TIMEOUT)
+        restore_dut(station)
+        assert station["ip"].startswith(TEST_AP_SUBNET)
@@ -7,6 +7,8 @@ import time
 
 import pytest
 
+from conftest import STA_BEACON_TIMEOUT, TEST_AP_SUBNET
+
 
 pytestmark = pytest.mark.wifi
 
@@ -14,66 +16,42 @@ pytestmark = pytest.mark.wifi
 class TestAPDropout:
     """WIFI-200 to WIFI-205: AP dropout and reconnection behavior."""
 
-    def test_reconnect_after_ap_drops(self, dut_on_test_ap, esp32_tester):
+    def test_reconnect_after_ap_drops(self, ap_dropout, esp32_tester):
         """WIFI-200: DUT reconnects after AP drops for 5 seconds."""
-        ssid = dut_on_test_ap["ssid"]
-        password = dut_on_test_ap["password"]
-
-        # Drop AP
-        esp32_tester.ap_stop()
-        time.sleep(5)
-
-        # Restart AP with same credentials
-        esp32_tester.ap_start(ssid, password)
-
-        # DUT should reconnect
-        station = esp32_tester.wait_for_station(timeout=30)
-        assert station["ip"].startswith("192.168.4.")
+        # Drop AP, restart it with same credentials; DUT should reconnect
+        station = ap_dropout(5)
+        assert station["ip"].startswith(TEST_AP_SUBNET)
 
         # Verify DUT is operational
         resp = esp32_tester.http_get(f"http://{station['ip']}/api/status")
         assert resp.status_code == 200
         assert resp.json()["wifi_connected"] is True
 
-    def test_brief_ap_dropout(self, dut_on_test_ap, esp32_tester):
+    def test_brief_ap_dropout(self, dut_on_test_ap, ap_dropout, esp32_tester):
         """WIFI-201: DUT recovers from a brief (2s) AP dropout without rebooting."""
-        ssid = dut_on_test_ap["ssid"]
-        password = dut_on_test_ap["password"]
-
         # Record uptime before dropout
         resp = esp32_tester.http_get(f"http://{dut_on_test_ap['ip']}/api/status")
         uptime_before = resp.json()["uptime"]
 
-        # Brief dropout
-        esp32_tester.ap_stop()
-        time.sleep(2)
-        esp32_tester.ap_start(ssid, password)
-
-        # Wait for reconnect
-        station = esp32_tester.wait_for_station(timeout=30)
+        # Brief dropout, wait for reconnect
+        station = ap_dropout(2)
 
         # Check uptime increased (no reboot)
         resp = esp32_tester.http_get(f"http://{station['ip']}/api/status")
         uptime_after = resp.json()["uptime"]
         assert uptime_after > uptime_before, "DUT appears to have rebooted"
 
-    def test_extended_ap_dropout(self, dut_on_test_ap, esp32_tester):
+    @pytest.mark.slow
+    def test_extended_ap_dropout(self, ap_dropout):
         """WIFI-202: DUT eventually reconnects after extended (90s) AP dropout."""
-        ssid = dut_on_test_ap["ssid"]
-        password = dut_on_test_ap["password"]
-
-        # Extended dropout (DUT may reboot during this)
-        esp32_tester.ap_stop()
-        time.sleep(90)
-
-        # Restart AP
-        esp32_tester.ap_start(ssid, password)
-
-        # DUT should eventually reconnect (may need a boot cycle)
-        station = esp32_tester.wait_for_station(timeout=60)
-        assert station["ip"].startswith("192.168.4.")
-
-    def test_ap_ssid_change_disconnects(self, dut_on_test_ap, esp32_tester):
+        # Extended dropout (DUT may reboot during this); DUT should
+        # eventually reconnect (may need a boot cycle)
+        station = ap_dropout(90, timeout=60)
+        assert station["ip"].startswith(TEST_AP_SUBNET)
+
+    def test_ap_ssid_change_disconnects(
+        self, dut_on_test_ap, esp32_tester, restore_test_ap
+    ):
         """WIFI-203: DUT cannot connect when AP SSID changes."""
         # Stop AP and restart with different SSID
         esp32_tester.ap_stop()
@@ -81,15 +59,11 @@ class TestAPDropout:
         esp32_tester.ap_start("DIFFERENT-SSID", dut_on_test_ap["password"])
 
         # DUT should NOT connect (wrong SSID)
-        with pytest.raises(Exception):  # TimeoutError from wait_for_station
-            esp32_tester.wait_for_station(timeout=15)
+        esp32_tester.expect_no_station()
 
-        # Cleanup: restore original AP so teardown can restore DUT
-        esp32_tester.ap_stop()
-        esp32_tester.ap_start(dut_on_test_ap["ssid"], dut_on_test_ap["password"])
-        esp32_tester.wait_for_station(timeout=60)
-
-    def test_ap_password_change_disconnects(self, dut_on_test_ap, esp32_tester):
+    def test_ap_password_change_disconnects(
+        self, dut_on_test_ap, esp32_tester, restore_test_ap
+    ):
         """WIFI-204: DUT cannot connect when AP password changes."""
         # Stop AP and restart with different password
         esp32_tester.ap_stop()
@@ -97,18 +71,10 @@ class TestAPDropout:
         esp32_tester.ap_start(dut_on_test_ap["ssid"], "wrong_password_999")
 
         # DUT should NOT connect (wrong password)
-        with pytest.raises(Exception):
-            esp32_tester.wait_for_station(timeout=15)
-
-        # Cleanup: restore original AP
-        esp32_tester.ap_stop()
-        esp32_tester.ap_start(dut_on_test_ap["ssid"], dut_on_test_ap["password"])
-        esp32_tester.wait_for_station(timeout=60)
+        esp32_tester.expect_no_station()
 
-    def test_multiple_dropout_cycles(self, dut_on_test_ap, esp32_tester):
+    def test_multiple_dropout_cycles(self, dut_on_test_ap, ap_dropout, esp32_tester):
         """WIFI-205: DUT reconnects through 5 dropout cycles, heap stays stable."""
-        ssid = dut_on_test_ap["ssid"]
-        password = dut_on_test_ap["password"]
         dut_ip = dut_on_test_ap["ip"]
 
         # Record initial heap
@@ -116,10 +82,8 @@ class TestAPDropout:
         initial_heap = resp.json()["free_heap"]
 
         for cycle in range(5):
-            esp32_tester.ap_stop()
-            time.sleep(10)
-            esp32_tester.ap_start(ssid, password)
-            station = esp32_tester.wait_for_station(timeout=30)
+            # Just long enough for the DUT to register the AP as lost
+            station = ap_dropout(STA_BEACON_TIMEOUT + 1)
             dut_ip = station["ip"]
 
         # Verify heap is stable (within 10% of initial)
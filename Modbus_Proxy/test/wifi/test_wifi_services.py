@@ -15,36 +15,30 @@ class TestNetworkServices:
 
     def test_full_rest_api_via_relay(self, dut_http):
         """WIFI-600: Key REST API endpoints work through the serial relay."""
+        resp = dut_http.get_many(
+            ["/api/status", "/api/config", "/", "/status", "/setup", "/nonexistent"]
+        )
+
         # GET /api/status
-        resp = dut_http.get("/api/status")
-        assert resp.status_code == 200
-        status = resp.json()
+        assert resp["/api/status"].status_code == 200
+        status = resp["/api/status"].json()
         assert "fw_version" in status
         assert "uptime" in status
         assert "free_heap" in status
 
         # GET /api/config
-        resp = dut_http.get("/api/config")
-        assert resp.status_code == 200
-        config = resp.json()
+        assert resp["/api/config"].status_code == 200
+        config = resp["/api/config"].json()
         assert "mqtt_host" in config
         assert "mqtt_port" in config
 
-        # GET / (dashboard)
-        resp = dut_http.get("/")
-        assert resp.status_code == 200
-
-        # GET /status (info page)
-        resp = dut_http.get("/status")
-        assert resp.status_code == 200
-
-        # GET /setup (config page)
-        resp = dut_http.get("/setup")
-        assert resp.status_code == 200
+        # GET / (dashboard), /status (info page), /setup (config page)
+        assert resp["/"].status_code == 200
+        assert resp["/status"].status_code == 200
+        assert resp["/setup"].status_code == 200
 
         # 404 for unknown path
-        resp = dut_http.get("/nonexistent")
-        assert resp.status_code == 404
+        assert resp["/nonexistent"].status_code == 404
 
     def test_ota_health_check(self, dut_http):
         """WIFI-601: OTA health endpoint responds via relay."""